@@ -1,21 +1,78 @@
-from flask import Flask, render_template, request, jsonify, Response, send_file
+from flask import Flask, render_template, request, jsonify, Response, send_from_directory, make_response, url_for
 from utils.skyward import SkywardGPA
+from utils.driver_pool import get_driver_pool
+from utils.runtime import get_supervisor
+from utils.locators import get_locator_registry
+from utils.jobs import JobManager, JobQueueFull
+from utils.store import get_store
+from utils.cache import ResultCache
+from utils.delta import DeltaTracker, build_delta
+from utils.history import HistoryStore
+from utils.tracing import TRACE_DIR, list_traces
+from utils.metrics import get_metrics
+from utils.security import user_key, sign_token, read_token
+from utils.gpa_engine import compute_gpas, apply_overrides
+from utils.payload import compact, encode
+from utils.assets import get_asset_manifest, IMMUTABLE_CACHE_CONTROL
 import os
 import json
-import glob
 
 app = Flask(__name__)
 app.config['ENV'] = os.environ.get('FLASK_ENV', 'production')
 
-# Global variable to store progress updates
-progress_updates = {}
+# Progress and job state shared by every gunicorn worker
+store = get_store()
+
+# Scrapes run here, sized independently of gunicorn's request threads
+job_manager = JobManager(store=store)
+
+# Recent results, so refreshes don't each launch a browser
+result_cache = ResultCache(store=store)
+
+# Recent grade versions per user, so refreshes only send what changed
+delta_tracker = DeltaTracker(store=store)
+
+# Every scrape's GPAs over time, for trend charts across school years
+history = HistoryStore(store=store)
+
+SIM_TOKEN_TTL = int(os.environ.get('SIM_TOKEN_TTL', 86400))
+
+# Fingerprinted CSS/JS from build_assets.py; without a build the page uses the CDN scripts
+assets = get_asset_manifest(app.root_path)
+
+@app.context_processor
+def asset_urls():
+    return {'assets': {name: url_for('get_asset', filename=hashed) for name, hashed in assets.files.items()}}
+
+def simulation_token(username, version):
+    """Token letting the holder run /simulate against one stored grade version"""
+    return sign_token({'purpose': 'simulate', 'user': user_key(username), 'version': version}, SIM_TOKEN_TTL)
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    # The page only changes on deploy, so repeat visits revalidate to a 304
+    response = make_response(render_template('index.html'))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/assets/<filename>')
+def get_asset(filename):
+    """Serve a built asset, precompressed when the browser accepts it, cached for good"""
+    picked = assets.pick(filename, request.headers.get('Accept-Encoding', ''))
+    if picked is None:
+        return jsonify({'error': 'Asset not found'}), 404
+    path, mimetype, encoding = picked
+    response = send_from_directory(assets.directory, path, mimetype=mimetype)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 @app.route('/calculate', methods=['POST'])
 def calculate():
+    """Queue a scrape and return its job id immediately, or a cached result"""
     try:
         username = request.form['username']
         password = request.form['password']
@@ -25,62 +82,239 @@ def calculate():
         
         # Get session ID from request headers or create one
         session_id = request.headers.get('X-Session-ID', f"{username}_{id(username)}")
-        progress_updates[session_id] = []
         
-        # Create calculator with progress callback
-        def progress_callback(message, progress):
-            if session_id in progress_updates:
-                progress_updates[session_id].append({
-                    'message': message,
-                    'progress': progress
-                })
+        # Version of the grades the client already has, for delta responses
+        since = request.form.get('since')
+        
+        # Assignment-level detail is opt-in since it costs extra requests to Skyward
+        detail = request.form.get('detail') in ('1', 'true')
         
-        calculator = SkywardGPA(username, password, progress_callback)
-        result = calculator.calculate()
+        # Compact clients get only a pointer here and fetch the grades from /result,
+        # which can answer 304 when they have not changed
+        compact_format = request.form.get('format') == 'compact'
         
-        # Clean up progress updates
-        if session_id in progress_updates:
-            del progress_updates[session_id]
+        def run(job_progress):
+            progress_key = f"session:{session_id}"
+            store.delete_progress(progress_key)
+            
+            # Create calculator with progress callback
+            def progress_callback(message, progress):
+                job_progress(message, progress)
+                store.append_progress(progress_key, message, progress)
+            
+            try:
+                previous = delta_tracker.load(username, since)
+                calculator = SkywardGPA(username, password, progress_callback, detail=detail)
+                result = calculator.calculate(previous=previous)
+                delta_tracker.record(username, result)
+                history.record(username, result)
+                result_cache.put(username, password, result)
+                if compact_format:
+                    return {'version': result['version'], 'sim_token': simulation_token(username, result['version'])}
+                payload = build_delta(previous, result) if previous else dict(result)
+                payload['sim_token'] = simulation_token(username, result['version'])
+                return payload
+            finally:
+                # Clean up progress updates
+                store.delete_progress(progress_key)
+                result_cache.release_refresh(username)
         
-        return jsonify(result)
+        # Serve a cached result instantly, refreshing it in the background once stale
+        cached = None if request.form.get('refresh') else result_cache.get(username, password)
+        if cached and detail and 'assignments' not in cached[0]:
+            cached = None
+        if cached and compact_format and 'version' not in cached[0]:
+            cached = None
+        if cached:
+            result, age, is_fresh = cached
+            if compact_format:
+                result = {'version': result['version'], 'sim_token': simulation_token(username, result['version'])}
+            elif 'version' in result:
+                version = result['version']
+                previous = delta_tracker.load(username, since)
+                if previous:
+                    result = build_delta(previous, result)
+                result['sim_token'] = simulation_token(username, version)
+            response = {'status': 'done', 'result': result, 'cached': True, 'age': int(age)}
+            if not is_fresh and result_cache.claim_refresh(username):
+                try:
+                    response['refresh_job_id'] = job_manager.submit(run)
+                except JobQueueFull:
+                    result_cache.release_refresh(username)
+            return jsonify(response)
+        
+        job_id = job_manager.submit(run)
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/simulate', methods=['POST'])
+def simulate():
+    """Recalculate GPAs with hypothetical grades against the user's last scraped grades"""
+    data = request.get_json(silent=True) or {}
+    token = read_token(data.get('token'))
+    if not token or token.get('purpose') != 'simulate':
+        return jsonify({'error': 'Invalid or expired simulation token, please recalculate'}), 401
+    
+    base = delta_tracker.load_by_key(token['user'], token['version'])
+    if base is None:
+        return jsonify({'error': 'Those grades are no longer available, please recalculate'}), 404
+    
+    overrides = data.get('overrides') or {}
+    if not isinstance(overrides, dict):
+        return jsonify({'error': 'overrides must map class names to {period: grade}'}), 400
+    try:
+        grades = apply_overrides(base['grades'], base['ordered_periods'], overrides)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    unweighted_gpas, weighted_gpas = compute_gpas(grades, base['ordered_periods'])
+    return jsonify({
+        'version': base['version'],
+        'unweighted_gpas': unweighted_gpas,
+        'weighted_gpas': weighted_gpas,
+    })
+
+@app.route('/result')
+def get_result():
+    """Compact grades for a sim_token, gzipped, with an ETag so unchanged grades return 304"""
+    token = read_token(request.args.get('token') or request.headers.get('X-Sim-Token'))
+    if not token or token.get('purpose') != 'simulate':
+        return jsonify({'error': 'Invalid or expired token, please recalculate'}), 401
+    
+    result = delta_tracker.load_by_key(token['user'], token['version'])
+    if result is None:
+        return jsonify({'error': 'Those grades are no longer available, please recalculate'}), 404
+    
+    data = compact(result) if request.args.get('format', 'compact') == 'compact' else result
+    status, headers, body = encode(data, request.headers.get('Accept-Encoding', ''),
+                                   request.headers.get('If-None-Match', ''))
+    return Response(body, status=status, headers=headers)
+
+@app.route('/history')
+def gpa_history():
+    """A user's GPA history across scrapes and school years, from the local snapshot store"""
+    token = read_token(request.args.get('token') or request.headers.get('X-Sim-Token'))
+    if not token or token.get('purpose') != 'simulate':
+        return jsonify({'error': 'Invalid or expired token, please recalculate'}), 401
+    return jsonify(history.series(token['user'], include_classes=request.args.get('classes') == '1'))
+
+def job_status(job_id):
+    """Status, latest progress and result of a job, with the HTTP status code"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return {'error': 'Job not found'}, 404
+    
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'][-1] if job['progress'] else None,
+    }
+    if job['status'] == 'queued':
+        response['position'] = job_manager.position(job_id)
+    if job['status'] == 'done':
+        response['result'] = job['result']
+    elif job['status'] == 'error':
+        response['error'] = job['error']
+    return response, 200
+
+def sse_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+def job_event_chunks(job, seen_seq, seen_status):
+    """SSE chunks for whatever changed in a job since seen_seq and seen_status
+
+    Returns (chunks, seen_seq, seen_status, finished). Shared by the Flask
+    stream below and the event-loop stream in asgi.py.
+    """
+    if job is None:
+        return [sse_event('failed', {'error': 'Job not found'})], seen_seq, seen_status, True
+    
+    updates = [update for update in job['progress'] if update['seq'] > seen_seq]
+    chunks = [sse_event('progress', update) for update in updates]
+    changed = bool(updates) or job['status'] != seen_status
+    if updates:
+        seen_seq = updates[-1]['seq']
+    seen_status = job['status']
+    
+    if job['status'] == 'done':
+        return chunks + [sse_event('result', job['result'])], seen_seq, seen_status, True
+    if job['status'] == 'error':
+        return chunks + [sse_event('failed', {'error': job['error']})], seen_seq, seen_status, True
+    if not changed:
+        # Keep proxies from closing an idle connection
+        chunks.append(": keepalive\n\n")
+    return chunks, seen_seq, seen_status, False
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Get status, latest progress and result of a queued scrape"""
+    response, status = job_status(job_id)
+    return jsonify(response), status
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream a job's progress as Server-Sent Events, ending with its result"""
+    def stream():
+        seen_seq = 0
+        seen_status = None
+        finished = False
+        while not finished:
+            job = job_manager.wait(job_id, seen_seq, seen_status)
+            chunks, seen_seq, seen_status, finished = job_event_chunks(job, seen_seq, seen_status)
+            yield from chunks
+
+    return Response(stream(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/progress/<session_id>')
 def get_progress(session_id):
     """Get progress updates for a session"""
-    if session_id in progress_updates:
-        updates = progress_updates[session_id]
-        return jsonify(updates)
-    return jsonify([])
+    updates = store.get_progress(f"session:{session_id}")
+    return jsonify([{'message': update['message'], 'progress': update['progress']} for update in updates])
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint covering every gunicorn worker"""
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/pool')
+def pool_stats():
+    """Report browser pool size and utilization for this worker"""
+    stats = get_driver_pool().stats()
+    stats['jobs'] = job_manager.stats()
+    stats['admission'] = job_manager.admission.stats()
+    stats['browsers'] = get_supervisor().stats()
+    stats['pid'] = os.getpid()
+    return jsonify(stats)
+
+@app.route('/debug/locators')
+def locator_stats():
+    """Report which locator strategies are winning and how often lookups fall back"""
+    return jsonify(get_locator_registry().stats())
 
 @app.route('/debug/screenshots')
 def list_screenshots():
-    """List available debug screenshots"""
+    """List saved debug traces from failed or sampled requests"""
     try:
-        screenshot_files = glob.glob('/tmp/debug_*.png')
-        screenshots = []
-        for file_path in screenshot_files:
-            filename = os.path.basename(file_path)
-            screenshots.append({
-                'filename': filename,
-                'url': f'/debug/screenshot/{filename}'
-            })
-        return jsonify(screenshots)
+        traces = list_traces()
+        for trace in traces:
+            trace['urls'] = [f"/debug/screenshot/{trace['request_id']}/{filename}" for filename in trace['files']]
+        return jsonify(traces)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/debug/screenshot/<filename>')
-def get_screenshot(filename):
-    """Serve a debug screenshot"""
-    try:
-        file_path = f'/tmp/{filename}'
-        if os.path.exists(file_path):
-            return send_file(file_path, mimetype='image/png')
-        else:
-            return jsonify({'error': 'Screenshot not found'}), 404
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+@app.route('/debug/screenshot/<request_id>/<filename>')
+def get_screenshot(request_id, filename):
+    """Serve a screenshot from a saved debug trace"""
+    # send_from_directory rejects paths that escape the trace directory
+    return send_from_directory(TRACE_DIR, f"{request_id}/{filename}", mimetype='image/png')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,172 @@
+"""
+Async entry point: job status and progress streams are served on an event
+loop, everything else by the Flask app on a bounded thread pool.
+
+    SERVER_MODE=async gunicorn        # see gunicorn.conf.py
+    uvicorn asgi:app --port 10000     # single process, for local testing
+
+Scrapes already run on JobManager's executor, so the only thing an open
+progress stream costs here is a coroutine and a socket.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from app import app as flask_app, job_manager, store, job_status, job_event_chunks, SSE_HEADERS
+import asyncio
+import json
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 15
+JOB_PATH = re.compile(r'^/jobs/([0-9a-f]{32})(/events)?$')
+
+# Store reads for the event loop: short, so a few threads serve every stream
+_io_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ASGI_IO_THREADS', 4)),
+                                  thread_name_prefix='asgi-io')
+# Flask requests; these replace gunicorn's per-request threads
+_wsgi_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ASGI_WSGI_THREADS', 16)),
+                                    thread_name_prefix='asgi-wsgi')
+
+
+class _FlaskInstance(WsgiToAsgiInstance):
+    # asgiref runs WSGI apps thread-sensitively by default, which would put
+    # every Flask request in this process on one shared thread
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False,
+                                 executor=_wsgi_executor)
+
+
+class _FlaskApp(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        return await _FlaskInstance(self.wsgi_application)(scope, receive, send)
+
+
+class JobWatcher:
+    """One polling loop per process that wakes every stream whose job changed"""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self._events = {}  # job id -> set of asyncio.Event
+        self._states = {}
+        self._task = None
+
+    def subscribe(self, job_id):
+        event = asyncio.Event()
+        self._events.setdefault(job_id, set()).add(event)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return event
+
+    def unsubscribe(self, job_id, event):
+        events = self._events.get(job_id)
+        if events is not None:
+            events.discard(event)
+            if not events:
+                del self._events[job_id]
+                self._states.pop(job_id, None)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._events:
+            job_ids = list(self._events)
+            try:
+                states = await loop.run_in_executor(_io_executor, store.job_states, job_ids)
+            except Exception as e:
+                logger.error(f"Error polling job states: {str(e)}")
+                states = None
+            if states is not None:
+                for job_id in job_ids:
+                    # A vanished job wakes its streams too, so they can report it
+                    state = states.get(job_id)
+                    if self._states.get(job_id, ()) != state:
+                        self._states[job_id] = state
+                        for event in self._events.get(job_id, ()):
+                            event.set()
+            await asyncio.sleep(self.interval)
+
+
+watcher = JobWatcher()
+flask_asgi = _FlaskApp(flask_app)
+
+
+async def _blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_io_executor, func, *args)
+
+
+async def _send_json(send, data, status=200):
+    body = json.dumps(data).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def get_job(send, job_id):
+    response, status = await _blocking(job_status, job_id)
+    await _send_json(send, response, status)
+
+
+async def job_events(receive, send, job_id):
+    """Same stream as Flask's /jobs/<id>/events, without holding a thread while idle"""
+    headers = [(b'content-type', b'text/event-stream; charset=utf-8')]
+    headers += [(name.lower().encode(), value.encode()) for name, value in SSE_HEADERS.items()]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+    changed = watcher.subscribe(job_id)
+    disconnected = asyncio.create_task(_wait_for_disconnect(receive))
+    seen_seq = 0
+    seen_status = None
+    try:
+        while True:
+            # Clear before reading, so a change that lands mid-read still wakes the next wait
+            changed.clear()
+            job = await _blocking(job_manager.get, job_id)
+            chunks, seen_seq, seen_status, finished = job_event_chunks(job, seen_seq, seen_status)
+            if chunks:
+                await send({'type': 'http.response.body', 'body': ''.join(chunks).encode(), 'more_body': True})
+            if finished:
+                break
+
+            waiting = asyncio.create_task(changed.wait())
+            await asyncio.wait({waiting, disconnected}, timeout=KEEPALIVE_SECONDS,
+                               return_when=asyncio.FIRST_COMPLETED)
+            waiting.cancel()
+            if disconnected.done():
+                return
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        watcher.unsubscribe(job_id, changed)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _io_executor.shutdown(wait=False)
+            _wsgi_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        match = JOB_PATH.match(scope['path'])
+        if match and match.group(2):
+            return await job_events(receive, send, match.group(1))
+        if match:
+            return await get_job(send, match.group(1))
+    return await flask_asgi(scope, receive, send)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Batch GPA calculation for a roster of students
+
+Usage:
+    python batch.py roster.csv -o results.jsonl --processes 4
+
+The roster is a CSV file with username,password columns or a JSON Lines
+file of {"username": ..., "password": ...} objects. Each worker process
+keeps its own browser and reuses it for every student it handles. One
+JSON line is written per student as soon as they finish.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+_worker_pool = None
+
+
+def load_roster(path):
+    """Read (username, password) pairs from a CSV or JSON Lines roster"""
+    students = []
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl') or path.endswith('.json'):
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    students.append((entry['username'], entry['password']))
+        else:
+            for row in csv.DictReader(f):
+                students.append((row['username'].strip(), row['password']))
+    return students
+
+
+def _init_worker():
+    """Give each worker process one warm, reusable browser"""
+    global _worker_pool
+    from utils.driver_pool import DriverPool
+    _worker_pool = DriverPool(size=1)
+    _worker_pool.warm()
+    # atexit does not run in pool workers; Finalize does
+    Finalize(None, _worker_pool.close, exitpriority=10)
+
+
+def _scrape(username, password):
+    from utils.skyward import SkywardGPA
+    from utils.history import get_history_store
+    started = time.monotonic()
+    try:
+        result = SkywardGPA(username, password, driver_pool=_worker_pool).calculate()
+        get_history_store().record(username, result)
+        return {'username': username, 'status': 'ok', 'result': result,
+                'elapsed': round(time.monotonic() - started, 2)}
+    except Exception as e:
+        return {'username': username, 'status': 'error', 'error': str(e),
+                'elapsed': round(time.monotonic() - started, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calculate GPAs for a roster of students')
+    parser.add_argument('roster', help='CSV (username,password) or JSON Lines roster file')
+    parser.add_argument('-o', '--output', default='-', help='JSON Lines output file (default: stdout)')
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count() or 2,
+                        help='Number of scraping processes, each with its own browser')
+    args = parser.parse_args()
+
+    students = load_roster(args.roster)
+    print(f"Scraping {len(students)} students with {args.processes} processes...", file=sys.stderr)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    started = time.monotonic()
+    failures = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.processes, initializer=_init_worker) as executor:
+            futures = [executor.submit(_scrape, username, password) for username, password in students]
+            for done, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                if record['status'] != 'ok':
+                    failures += 1
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+                print(f"[{done}/{len(students)}] {record['username']}: {record['status']} "
+                      f"({record['elapsed']}s)", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Finished in {time.monotonic() - started:.1f}s with {failures} failures", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
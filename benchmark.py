@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the scrape pipeline against the fake Skyward server
+
+Usage:
+    python benchmark.py                          # GPA math, parsing and HTTP backend
+    python benchmark.py --selenium               # also time each browser stage (needs Chrome)
+    python benchmark.py -o before.json
+    python benchmark.py --baseline before.json   # exit 1 if any median got slower
+
+Every benchmark runs once per schedule size (number of classes) so the
+cost of larger gradebooks is visible. Medians are compared against the
+baseline; p99 is reported for spotting jitter.
+"""
+from werkzeug.serving import make_server
+from fake_skyward import create_app, generate_gradebook, render_gradebook, BASE_PATH, PERIODS
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+PASSWORD = 'secret'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def start_fake_server(app):
+    """Serve the fake Skyward app on a free local port in a background thread"""
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='fake-skyward', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}{BASE_PATH}'
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, name, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.samples.setdefault(name, []).append(time.perf_counter() - started)
+        return result
+
+    def summary(self):
+        return {name: {'runs': len(samples),
+                       'median_ms': percentile(samples, 0.5) * 1000,
+                       'p99_ms': percentile(samples, 0.99) * 1000}
+                for name, samples in self.samples.items()}
+
+
+def student_grades(classes, seed):
+    rng = random.Random(seed)
+    grades = {f'Class {index}': {period: float(rng.randint(70, 100)) for period in PERIODS}
+              for index in range(classes)}
+    return grades, list(PERIODS)
+
+
+def bench_gpa(recorder, sizes, repeat):
+    from utils import gpa_engine
+    for classes in sizes:
+        grades, periods = student_grades(classes, classes)
+        for _ in range(repeat):
+            recorder.time(f'gpa.vectorized[{classes}]', gpa_engine.compute_gpas, grades, periods)
+            recorder.time(f'gpa.python[{classes}]', gpa_engine._compute_python, grades, periods)
+        roster = [student_grades(classes, seed) for seed in range(100)]
+        for _ in range(max(1, repeat // 10)):
+            recorder.time(f'gpa.batch100[{classes}]', gpa_engine.compute_batch, roster)
+
+
+def bench_parse(recorder, sizes, repeat):
+    from utils.http_backend import parse_gradebook
+    for classes in sizes:
+        html = render_gradebook(generate_gradebook(classes, len(PERIODS), 0))
+        for _ in range(repeat):
+            recorder.time(f'parse_gradebook[{classes}]', parse_gradebook, html, PERIODS)
+
+
+def bench_http(recorder, app, sizes, repeat):
+    from utils.http_backend import HttpSkywardBackend
+    backend = HttpSkywardBackend()
+    for classes in sizes:
+        app.config['CLASSES'] = classes
+        for _ in range(repeat):
+            recorder.time(f'http.fetch[{classes}]', backend.fetch, 'bench', PASSWORD, PERIODS)
+            recorder.time(f'http.fetch_details[{classes}]', backend.fetch, 'bench', PASSWORD, PERIODS, None, None,
+                          True)
+
+
+def bench_selenium(recorder, app, sizes, repeat):
+    from utils.driver_pool import DriverPool
+    from utils.skyward import SkywardGPA
+    pool = DriverPool(size=1)
+    try:
+        for classes in sizes:
+            app.config['CLASSES'] = classes
+            for _ in range(repeat):
+                calculator = SkywardGPA('bench', PASSWORD, driver_pool=pool, backend='selenium')
+                # The first checkout launches Chrome, later ones reuse it
+                calculator.driver = recorder.time('selenium.driver_checkout', pool.checkout)
+                try:
+                    recorder.time(f'selenium.login[{classes}]', calculator.login)
+                    recorder.time(f'selenium.navigate_to_gradebook[{classes}]', calculator.navigate_to_gradebook)
+                    recorder.time(f'selenium.extract_grades_bulk[{classes}]', calculator.extract_grades_bulk)
+                    calculator.grades_raw, calculator.grades = {}, {}
+                    recorder.time(f'selenium.extract_grades_legacy[{classes}]', calculator.extract_grades_legacy)
+                    recorder.time(f'selenium.calculate_gpas[{classes}]', calculator.calculate_gpas)
+                    recorder.time(f'selenium.extract_details[{classes}]', calculator.extract_details)
+                finally:
+                    recorder.time('selenium.driver_release', pool.release, calculator.driver)
+    finally:
+        pool.close()
+
+
+def compare(results, baseline, threshold):
+    """Names whose median is more than threshold slower than the baseline"""
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if before and stats['median_ms'] > before['median_ms'] * (1 + threshold):
+            regressions.append((name, before['median_ms'], stats['median_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrape pipeline against a fake Skyward server')
+    parser.add_argument('--sizes', default='4,8,16,32', help='Comma-separated class counts to benchmark')
+    parser.add_argument('--repeat', type=int, default=50, help='Runs per in-process benchmark')
+    parser.add_argument('--network-repeat', type=int, default=10, help='Runs per HTTP benchmark')
+    parser.add_argument('--selenium', action='store_true', help='Also benchmark the browser stages')
+    parser.add_argument('--selenium-repeat', type=int, default=3)
+    parser.add_argument('-o', '--output', help='Write results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed median slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    app = create_app(password=PASSWORD)
+    server, base_url = start_fake_server(app)
+    # Must be set before utils is imported so every module points at the fake server
+    os.environ['SKYWARD_BASE_URL'] = base_url
+    os.environ.setdefault('STORE_PATH', os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+    logging.disable(logging.INFO)
+
+    recorder = Recorder()
+    try:
+        bench_gpa(recorder, sizes, args.repeat)
+        bench_parse(recorder, sizes, args.repeat)
+        bench_http(recorder, app, sizes, args.network_repeat)
+        if args.selenium:
+            bench_selenium(recorder, app, sizes, args.selenium_repeat)
+    finally:
+        server.shutdown()
+
+    results = recorder.summary()
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'runs':>5}  {'median ms':>10}  {'p99 ms':>10}")
+    for name, stats in results.items():
+        print(f"{name:<{width}}  {stats['runs']:>5}  {stats['median_ms']:>10.3f}  {stats['p99_ms']:>10.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.3f}ms -> {after:.3f}ms", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
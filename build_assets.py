@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, precompressed static assets into static/dist
+
+Usage:
+    TAILWIND_SHA256=... CHARTJS_SHA256=... python build_assets.py     # download pinned tools on first run
+    python build_assets.py --tailwind ./tailwindcss --chartjs ./chart.umd.js   # offline
+
+Downloads are only used if their SHA-256 matches the expected digest
+(--tailwind-sha256/--chartjs-sha256, or the variables above); the Tailwind
+digest is for this platform's CLI build. Local copies are checked too when
+a digest is given.
+
+Tailwind CSS is compiled from the classes used in templates/ and
+static/js/ (plus static/css/style.css), Chart.js is bundled with main.js,
+and every output gets a content hash in its name so it can be cached
+forever. static/dist/manifest.json maps logical names (app.css, app.js)
+to the hashed files; the app serves them from /assets/ and falls back to
+the CDN scripts when no build exists.
+"""
+from utils.assets import DIST_DIR, MANIFEST_NAME
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import platform
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import urllib.request
+
+try:
+    import rjsmin
+except ImportError:  # Ship main.js unminified; gzip still removes most of the difference
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:  # gzip variants only
+    brotli = None
+
+TAILWIND_VERSION = '3.4.1'
+CHARTJS_VERSION = '4.4.1'
+CHARTJS_URL = f'https://cdn.jsdelivr.net/npm/chart.js@{CHARTJS_VERSION}/dist/chart.umd.js'
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('ASSET_CACHE_DIR', os.path.join(ROOT, '.asset-cache'))
+CONTENT_GLOBS = ['templates/**/*.html', 'static/js/**/*.js']
+TAILWIND_DIRECTIVES = '@tailwind base;\n@tailwind components;\n@tailwind utilities;\n'
+IMAGES = ['alvinisd-logo.png']
+COMPRESSIBLE = ('.css', '.js')
+
+
+def tailwind_url():
+    system = {'Linux': 'linux', 'Darwin': 'macos', 'Windows': 'windows'}[platform.system()]
+    arch = 'arm64' if platform.machine().lower() in ('arm64', 'aarch64') else 'x64'
+    suffix = '.exe' if system == 'windows' else ''
+    return (f'https://github.com/tailwindlabs/tailwindcss/releases/download/'
+            f'v{TAILWIND_VERSION}/tailwindcss-{system}-{arch}{suffix}')
+
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify(path, expected):
+    """Exit unless the file at path has the expected SHA-256"""
+    actual = sha256_of(path)
+    if actual != expected.strip().lower():
+        sys.exit(f"SHA-256 mismatch for {path}: expected {expected}, got {actual}")
+
+
+def cached_download(url, name, expected):
+    """Download url into the cache directory once, verify it and return its path"""
+    if not expected:
+        sys.exit(f"Refusing to download {url} without an expected SHA-256 (see build_assets.py --help)")
+    path = os.path.join(CACHE_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        print(f"Downloading {url}")
+        with urllib.request.urlopen(url, timeout=60) as response, open(path + '.part', 'wb') as f:
+            shutil.copyfileobj(response, f)
+        # Check before the file can land in the cache, so a bad download is never reused
+        try:
+            verify(path + '.part', expected)
+        except SystemExit:
+            os.remove(path + '.part')
+            raise
+        os.replace(path + '.part', path)
+    else:
+        # The cache may outlive the digest it was checked against
+        verify(path, expected)
+    return path
+
+
+def build_css(tailwind):
+    with open(os.path.join(ROOT, 'static', 'css', 'style.css')) as f:
+        source = TAILWIND_DIRECTIVES + f.read()
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = os.path.join(tmp, 'input.css')
+        output_path = os.path.join(tmp, 'app.css')
+        with open(source_path, 'w') as f:
+            f.write(source)
+        subprocess.run([tailwind, '-i', source_path, '-o', output_path, '--minify',
+                        '--content', ','.join(CONTENT_GLOBS)], cwd=ROOT, check=True)
+        with open(output_path, 'rb') as f:
+            return f.read()
+
+
+def build_js(chartjs):
+    with open(chartjs, 'rb') as f:
+        bundle = f.read()
+    with open(os.path.join(ROOT, 'static', 'js', 'main.js')) as f:
+        main = f.read()
+    if rjsmin is not None:
+        main = rjsmin.jsmin(main)
+    # Chart.js first, so the Chart global exists before main.js runs
+    return bundle.rstrip() + b'\n;\n' + main.encode()
+
+
+def write_asset(dist, name, content):
+    """Write content under a hashed name, with compressed variants; returns the hashed name"""
+    stem, ext = os.path.splitext(name)
+    hashed = f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+    with open(os.path.join(dist, hashed), 'wb') as f:
+        f.write(content)
+    if ext in COMPRESSIBLE:
+        # mtime=0 keeps the .gz byte-identical across builds
+        with open(os.path.join(dist, hashed + '.gz'), 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(os.path.join(dist, hashed + '.br'), 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+    return hashed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build fingerprinted static assets into static/dist')
+    parser.add_argument('--tailwind', help='Tailwind CSS standalone CLI (downloaded if omitted)')
+    parser.add_argument('--chartjs', help='Chart.js UMD build (downloaded if omitted)')
+    parser.add_argument('--tailwind-sha256', default=os.environ.get('TAILWIND_SHA256'),
+                        help=f'SHA-256 of the Tailwind CLI v{TAILWIND_VERSION} for this platform')
+    parser.add_argument('--chartjs-sha256', default=os.environ.get('CHARTJS_SHA256'),
+                        help=f'SHA-256 of chart.umd.js v{CHARTJS_VERSION}')
+    args = parser.parse_args()
+
+    if args.tailwind:
+        tailwind = args.tailwind
+        if args.tailwind_sha256:
+            verify(tailwind, args.tailwind_sha256)
+    else:
+        tailwind = cached_download(tailwind_url(), f'tailwindcss-{TAILWIND_VERSION}', args.tailwind_sha256)
+    os.chmod(tailwind, os.stat(tailwind).st_mode | stat.S_IXUSR)
+    if args.chartjs:
+        chartjs = args.chartjs
+        if args.chartjs_sha256:
+            verify(chartjs, args.chartjs_sha256)
+    else:
+        chartjs = cached_download(CHARTJS_URL, f'chart-{CHARTJS_VERSION}.umd.js', args.chartjs_sha256)
+
+    outputs = {'app.css': build_css(tailwind), 'app.js': build_js(chartjs)}
+    for name in IMAGES:
+        with open(os.path.join(ROOT, 'static', name), 'rb') as f:
+            outputs[name] = f.read()
+
+    # Build into a staging directory so a failed build leaves the previous assets in place
+    dist = os.path.join(ROOT, DIST_DIR)
+    staging = dist + '.new'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    manifest = {name: write_asset(staging, name, content) for name, content in outputs.items()}
+    with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(dist, ignore_errors=True)
+    os.replace(staging, dist)
+
+    for name, hashed in manifest.items():
+        sizes = [os.path.getsize(os.path.join(dist, hashed + suffix))
+                 for suffix in ('', '.gz', '.br') if os.path.exists(os.path.join(dist, hashed + suffix))]
+        print(f"{name:<20} {hashed:<36} {' / '.join(f'{size:,}' for size in sizes)} bytes")
+    if rjsmin is None:
+        print("rjsmin is not installed, main.js was bundled unminified", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
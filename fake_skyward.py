@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Skyward family access pages the scraper uses
+
+Usage:
+    python fake_skyward.py --port 8765 --classes 8
+    SKYWARD_BASE_URL=http://127.0.0.1:8765/skyward python app.py
+
+Serves a login page, home page and gradebook laid out so every XPath in
+utils/skyward.py and utils/locators.py resolves, plus the skyporthttp.w
+login used by the HTTP backend. Any username is accepted with the
+configured password; the gradebook grid is generated from a seed so runs
+are repeatable.
+"""
+from flask import Flask, request, redirect, make_response
+from html import escape
+import argparse
+import random
+import secrets
+import time
+
+BASE_PATH = '/skyward'
+PERIODS = ['1U1', '1U2', 'NW1', '2U1', '2U2', 'NW2', 'EX1', 'SM1',
+           '3U1', '3U2', 'NW3', '4U1', '4U2', 'NW4', 'EX2', 'SM2', 'YR']
+COURSES = ['AP English Lang', 'APA Algebra II', 'Chemistry', 'World History', 'Academic Dec 1',
+           'Spanish II', 'AP Computer Science', 'Art I', 'Ind Study Tech Applications', 'Health']
+SESSION_COOKIE = 'SkywardSession'
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Skyward Family Access</title></head>
+<body>
+<form method="post" action="sfhome01.w">
+<div><div>
+<div></div><div></div><div></div>
+<div>
+  <div></div>
+  <div><div>
+    <div></div>
+    <div><div><table><tbody>
+      <tr class="field" style="display:none"><td>Login ID:</td><td><input name="login" type="text"></td></tr>
+      <tr class="field" style="display:none"><td>Password:</td><td><input name="password" type="password"></td></tr>
+      <tr><td></td></tr><tr><td></td></tr><tr><td></td></tr><tr><td></td></tr>
+      <tr><td><a href="#" id="bLogin">Sign In</a></td></tr>
+    </tbody></table></div></div>
+  </div></div>
+</div>
+</div></div>
+</form>
+{error}
+<div id="lockDiv" style="display:none"></div>
+<script>
+document.getElementById('bLogin').addEventListener('click', function (event) {{
+    event.preventDefault();
+    var fields = document.querySelectorAll('tr.field');
+    if (fields[0].style.display === 'none') {{
+        fields.forEach(function (row) {{ row.style.display = ''; }});
+    }} else {{
+        document.forms[0].submit();
+    }}
+}});
+</script>
+</body></html>"""
+
+NAV = """<div>
+    <div></div>
+    <div>
+      <div><div>
+        <ul><li><a href="#" onclick="document.getElementById('nav').style.display='block'; return false;">Menu</a></li></ul>
+        <ul id="nav" style="display:none">
+          <li><a href="sfhome01.w">Home</a></li>
+          <li><a href="sfgradebook001.w">Gradebook</a></li>
+          <li><a href="sfcalendar001.w">Calendar</a></li>
+        </ul>
+      </div></div>
+      {content}
+    </div>
+  </div>"""
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title></head>
+<body><div>
+  <div></div>
+  {nav}
+</div></body></html>"""
+
+GRADEBOOK = """<div><div>
+  <div></div><div></div><div></div>
+  <div>
+    <div></div><div></div><div></div>
+    <div>
+      <div></div>
+      <div>
+        <div><div><div>
+          <div><table><thead><tr>{headers}</tr></thead></table></div>
+          <div><table><tbody>{grade_rows}</tbody></table></div>
+        </div></div></div>
+        <div>
+          <div></div>
+          <div><table><tbody>{class_rows}</tbody></table></div>
+        </div>
+      </div>
+    </div>
+  </div>
+</div></div>"""
+
+GRADE_CELL = '<td><a href="#" data-cni="{course}" data-sec="{course}" data-bkt="{period}">{grade}</a></td>'
+
+DETAIL_DIALOG = """<data><![CDATA[<div class="gradeInfo">
+<table><thead><tr><th>Due</th><th>Assignment</th><th>Grade</th><th>Score(%)</th><th>Points Earned</th></tr></thead>
+<tbody>{rows}</tbody></table>
+</div>]]></data>"""
+
+CLASS_ROW = ('<tr><td><div><table><tbody><tr><td>{period}</td><td><span><a href="#">{name}</a></span></td></tr>'
+             '<tr><td></td><td>Teacher {period}</td></tr></tbody></table></div></td></tr>')
+
+
+def generate_gradebook(classes, filled, seed, pass_fail=False):
+    """Class names and grade cells for a student with `classes` courses and `filled` graded periods"""
+    rng = random.Random(seed)
+    rows = []
+    for index in range(classes):
+        name = COURSES[index % len(COURSES)]
+        if index >= len(COURSES):
+            name = f"{name} {index // len(COURSES) + 1}"
+        cells = [str(rng.randint(70, 100)) if column < filled else '' for column in range(len(PERIODS))]
+        rows.append((name, cells))
+    if pass_fail:
+        rows.append(('Office Aide', ['P' if column < filled else '' for column in range(len(PERIODS))]))
+    return rows
+
+
+def render_cell(course, period, grade):
+    if grade.isnumeric():
+        return GRADE_CELL.format(course=course, period=period, grade=grade)
+    return f'<td>{grade}</td>'
+
+
+def render_gradebook(rows):
+    headers = ''.join(f'<th>{period}</th>' for period in PERIODS)
+    grade_rows = ''.join('<tr>' + ''.join(render_cell(index + 1, period, cell) for period, cell in zip(PERIODS, cells))
+                         + '</tr>' for index, (_, cells) in enumerate(rows))
+    class_rows = ''.join(CLASS_ROW.format(period=index + 1, name=escape(name)) for index, (name, _) in enumerate(rows))
+    return GRADEBOOK.format(headers=headers, grade_rows=grade_rows, class_rows=class_rows)
+
+
+def render_details(seed, course, period):
+    """Assignment dialog for one class and grading period"""
+    rng = random.Random(f'{seed}:{course}:{period}')
+    rows = []
+    for index in range(rng.randint(3, 6)):
+        grade = rng.randint(60, 100)
+        rows.append(f'<tr><td>{rng.randint(1, 12)}/{rng.randint(1, 28)}</td><td><a href="#">Assignment {index + 1}</a></td>'
+                    f'<td>{grade}</td><td>{grade}.00</td><td>{grade} out of 100</td></tr>')
+    return DETAIL_DIALOG.format(rows=''.join(rows))
+
+
+def create_app(classes=7, filled=len(PERIODS), seed=0, password='secret', pass_fail=False, detail_delay=0.0):
+    """Fake Skyward app; change app.config['CLASSES'] etc. between requests to resize the grid"""
+    app = Flask(__name__)
+    app.config.update(CLASSES=classes, FILLED=filled, SEED=seed, PASSWORD=password, PASS_FAIL=pass_fail,
+                      DETAIL_DELAY=detail_delay)
+    sessions = set()
+
+    def page(title, content=''):
+        return PAGE.format(title=title, nav=NAV.format(content=content))
+
+    def authenticated():
+        token = request.cookies.get(SESSION_COOKIE) or request.form.get('encses')
+        return token in sessions
+
+    @app.route(f'{BASE_PATH}/fwemnu01.w')
+    def login_page():
+        return LOGIN_PAGE.format(error='')
+
+    @app.route(f'{BASE_PATH}/sfhome01.w', methods=['GET', 'POST'])
+    def home():
+        if request.method == 'POST':
+            if request.form.get('password') != app.config['PASSWORD']:
+                return LOGIN_PAGE.format(error='<div class="validation-error">Invalid login or password</div>')
+            token = secrets.token_hex(16)
+            sessions.add(token)
+            response = make_response(page('Home'))
+            response.set_cookie(SESSION_COOKIE, token, path='/')
+            return response
+        if not authenticated():
+            return redirect('fwemnu01.w')
+        return page('Home')
+
+    @app.route(f'{BASE_PATH}/skyporthttp.w', methods=['POST'])
+    def http_login():
+        if request.form.get('password') != app.config['PASSWORD']:
+            return '<li></li>'
+        token = secrets.token_hex(16)
+        sessions.add(token)
+        fields = ['dwd', 'sess1', 'sess2', 'wfaacl', '', '', 'Student'] + [''] * 7 + [token]
+        response = make_response(f"<li>{'^'.join(fields)}</li>")
+        response.set_cookie(SESSION_COOKIE, token, path='/')
+        return response
+
+    @app.route(f'{BASE_PATH}/sfgradebook001.w', methods=['GET', 'POST'])
+    def gradebook():
+        if not authenticated():
+            return 'Your session has expired'
+        if request.form.get('action') == 'viewGradeInfoDialog':
+            # Simulated server time per dialog, to show the effect of fetching them in parallel
+            time.sleep(app.config['DETAIL_DELAY'])
+            return render_details(app.config['SEED'], request.form.get('corNumId'), request.form.get('bucket'))
+        rows = generate_gradebook(app.config['CLASSES'], app.config['FILLED'], app.config['SEED'],
+                                  app.config['PASS_FAIL'])
+        return page('Gradebook', render_gradebook(rows))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fake Skyward pages for local testing')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--classes', type=int, default=7, help='Number of classes in the gradebook')
+    parser.add_argument('--filled', type=int, default=len(PERIODS), help='Number of grading periods with grades')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--password', default='secret', help='Password accepted for every username')
+    parser.add_argument('--detail-delay', type=float, default=0.0, help='Seconds to wait before answering each '
+                                                                         'assignment dialog')
+    args = parser.parse_args()
+    print(f"Set SKYWARD_BASE_URL=http://127.0.0.1:{args.port}{BASE_PATH}")
+    app = create_app(args.classes, args.filled, args.seed, args.password, detail_delay=args.detail_delay)
+    app.run(port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
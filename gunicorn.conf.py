@@ -1,3 +1,30 @@
+# Job and progress state lives in the shared store (utils/store.py), so any
+# worker can answer any /jobs poll. HTTP concurrency is workers x threads;
+# scrape concurrency is workers x SCRAPE_WORKERS.
+import math
+import os
+
 workers = 4
+if os.environ.get('SERVER_MODE', 'sync') == 'async':
+    # Event-loop workers (asgi.py): open progress streams and job polls cost
+    # a coroutine each instead of a thread, so thousands can wait at once
+    worker_class = "uvicorn.workers.UvicornWorker"
+    wsgi_app = "asgi:app"
+else:
+    worker_class = "gthread"
+    wsgi_app = "app:app"
+    threads = 16  # Each open progress stream holds one thread
 bind = "0.0.0.0:10000"
-timeout = 120  # Increased timeout for Selenium operations 
\ No newline at end of file
+timeout = 120  # Increased timeout for Selenium operations 
+
+
+def post_fork(server, worker):
+    # Pre-launch browsers so the first student doesn't pay Chrome cold start.
+    # Only when every scrape needs one: in auto mode most never do, and idle
+    # Chromes eat the memory admission checks before starting a scrape.
+    if os.environ.get('SCRAPER_BACKEND', 'auto').lower() != 'selenium':
+        return
+    from utils.driver_pool import get_driver_pool
+    # Spread the warm browsers so all workers together hold about ADMISSION_SLOTS
+    slots = int(os.environ.get('ADMISSION_SLOTS', 4))
+    get_driver_pool().warm(count=math.ceil(slots / server.cfg.workers))
@@ -1,6 +1,7 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from utils.weighting import get_weighting_rules
 import time
 
 # Set up the web driver (make sure to specify the path to your ChromeDriver)
@@ -134,6 +135,9 @@ try:
         for period, grade in grades_dict.items():
             print(f"  {period}: {grade}")
 
+    # Same weighting rules as the web app (WEIGHTING_RULES, or the Alvin ISD defaults)
+    rules = get_weighting_rules()
+
     # Calculate unweighted GPA for each grading period
     print("\nUnweighted GPA Calculations:")
     
@@ -153,8 +157,8 @@ try:
         for class_name, class_grades in grades.items():
             if period in class_grades:
                 grade = class_grades[period]
-                # Calculate GPA: Start with 6.0 and subtract 0.1 for each point below 100
-                gpa = 6.0 - (100 - grade) * 0.1
+                # Calculate GPA: Start with the unweighted base and subtract a step for each point below 100
+                gpa = rules.unweighted_base - (100 - grade) * rules.step
                 total_gpa += gpa
                 num_classes += 1
                 print(f"{class_name}: Grade = {grade}, GPA = {gpa:.2f}")
@@ -189,18 +193,11 @@ try:
                 grade = class_grades[period]
                 
                 # Determine the base GPA scale based on class name
-                if "APA" in class_name:  # Must check APA first since it contains "AP"
-                    base_gpa = 7.0
-                    class_type = "APA"
-                elif "AP" in class_name:
-                    base_gpa = 8.0
-                    class_type = "AP"
-                else:
-                    base_gpa = 6.0
-                    class_type = "Regular"
+                weight = rules.classify(class_name)
+                class_type = weight.name
                 
-                # Calculate GPA: Start with base_gpa and subtract 0.1 for each point below 100
-                weighted_gpa = base_gpa - (100 - grade) * 0.1
+                # Calculate GPA: Start with the course's base GPA and subtract its step for each point below 100
+                weighted_gpa = weight.base - (100 - grade) * weight.step
                 total_gpa += weighted_gpa
                 num_classes += 1
                 print(f"{class_name} ({class_type}): Grade = {grade}, Weighted GPA = {weighted_gpa:.2f}")
@@ -39,37 +39,39 @@ document.getElementById('login-btn').addEventListener('click', async () => {
         // Create a unique session ID
         const sessionId = `${username}_${Date.now()}`;
         
-        // Start polling for progress updates
-        const progressInterval = setInterval(async () => {
-            try {
-                const progressResponse = await fetch(`/progress/${sessionId}`);
-                const progressData = await progressResponse.json();
-                
-                if (progressData.length > 0) {
-                    const latestUpdate = progressData[progressData.length - 1];
-                    updateLoadingStatus(latestUpdate.message, latestUpdate.progress);
-                }
-            } catch (error) {
-                console.log('Progress polling error:', error);
-            }
-        }, 500); // Poll every 500ms
+        // Grades from the last visit let the server skip unchanged work and answer 304
+        const saved = loadSavedResult(username);
+        let body = `username=${encodeURIComponent(username)}&password=${encodeURIComponent(password)}&format=compact`;
+        if (saved && saved.version) {
+            body += `&since=${encodeURIComponent(saved.version)}`;
+        }
         
+        // Queue the scrape - the server answers right away with a job id
         const response = await fetch('/calculate', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/x-www-form-urlencoded',
                 'X-Session-ID': sessionId,
             },
-            body: `username=${encodeURIComponent(username)}&password=${encodeURIComponent(password)}`
+            body: body
         });
         
-        // Stop polling
-        clearInterval(progressInterval);
+        const job = await response.json();
+        
+        if (job.error) {
+            throw new Error(job.error);
+        }
         
-        const data = await response.json();
+        // Cached results come back immediately; otherwise wait for the scrape
+        const pointer = job.status === 'done' ? job.result : await waitForJob(job.job_id);
+        const data = await fetchResult(username, saved, pointer);
         
-        if (data.error) {
-            throw new Error(data.error);
+        if (job.refresh_job_id) {
+            // Stale cache entry - show it now and swap in fresh grades when ready
+            pollJob(job.refresh_job_id)
+                .then(refreshed => fetchResult(username, data, refreshed))
+                .then(displayResults)
+                .catch(error => console.log('Background refresh failed:', error));
         }
         
         // Update status: Completing
@@ -94,6 +96,108 @@ document.getElementById('login-btn').addEventListener('click', async () => {
     }
 });
 
+function loadSavedResult(username) {
+    try {
+        // Earlier versions kept results in localStorage; don't leave them for the next person at this computer
+        localStorage.removeItem(`skyward-result:${username}`);
+        return JSON.parse(sessionStorage.getItem(`skyward-result:${username}`));
+    } catch (error) {
+        return null;
+    }
+}
+
+async function fetchResult(username, saved, pointer) {
+    // Compact grades for a finished scrape; 304 means the saved copy is still current
+    const headers = {};
+    if (saved && saved.etag) {
+        headers['If-None-Match'] = saved.etag;
+    }
+    const response = await fetch(`/result?token=${encodeURIComponent(pointer.sim_token)}`, { headers });
+    
+    let data;
+    if (response.status === 304) {
+        data = saved;
+    } else if (response.ok) {
+        data = await response.json();
+        data.etag = response.headers.get('ETag');
+    } else {
+        const error = await response.json().catch(() => ({}));
+        throw new Error(error.error || `Loading results failed with status ${response.status}`);
+    }
+    data.sim_token = pointer.sim_token;
+    
+    try {
+        // Only for this tab, and without the token: it opens /result, /simulate and /history with no password
+        const { sim_token, ...stored } = data;
+        sessionStorage.setItem(`skyward-result:${username}`, JSON.stringify(stored));
+    } catch (error) {
+        console.log('Could not save results:', error);
+    }
+    return data;
+}
+
+function waitForJob(jobId) {
+    // Prefer the progress stream; fall back to polling if it is unavailable
+    if (!window.EventSource) {
+        return pollJob(jobId);
+    }
+    
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(`/jobs/${jobId}/events`);
+        let finished = false;
+        
+        events.addEventListener('progress', (event) => {
+            const update = JSON.parse(event.data);
+            updateLoadingStatus(update.message, update.progress);
+        });
+        events.addEventListener('result', (event) => {
+            finished = true;
+            events.close();
+            resolve(JSON.parse(event.data));
+        });
+        events.addEventListener('failed', (event) => {
+            finished = true;
+            events.close();
+            reject(new Error(JSON.parse(event.data).error));
+        });
+        events.onerror = () => {
+            if (finished) {
+                return;
+            }
+            console.log('Progress stream lost, polling instead');
+            finished = true;
+            events.close();
+            pollJob(jobId).then(resolve, reject);
+        };
+    });
+}
+
+async function pollJob(jobId) {
+    // Poll the job until the scrape finishes, showing its latest progress
+    while (true) {
+        await sleep(500); // Poll every 500ms
+        
+        let job;
+        try {
+            const jobResponse = await fetch(`/jobs/${jobId}`);
+            job = await jobResponse.json();
+        } catch (error) {
+            console.log('Job polling error:', error);
+            continue;
+        }
+        
+        if (job.progress) {
+            updateLoadingStatus(job.progress.message, job.progress.progress);
+        }
+        if (job.status === 'done') {
+            return job.result;
+        }
+        if (job.status === 'error' || job.error) {
+            throw new Error(job.error);
+        }
+    }
+}
+
 function updateLoadingStatus(message, progress, isError = false) {
     const statusElement = document.getElementById('status-message');
     const progressBar = document.getElementById('progress-bar');
@@ -112,6 +216,8 @@ function sleep(ms) {
     return new Promise(resolve => setTimeout(resolve, ms));
 }
 
+let weightedChart = null;
+
 function displayResults(data) {
     // First thing: manage visibility
     document.getElementById('login-section').classList.add('hidden');
@@ -120,27 +226,21 @@ function displayResults(data) {
 
     // Debug logging
     console.log('Raw data from Python:', data);
-    console.log('Ordered Periods from Python:', data.ordered_periods);
-    console.log('Grades:', data.grades);
-    console.log('Unweighted GPAs:', data.unweighted_gpas);
-    console.log('Weighted GPAs:', data.weighted_gpas);
 
-    // Use the ordered periods from Python
-    const orderedPeriods = data.ordered_periods;
+    // Compact results: grades[row][col] and the GPA arrays line up with classes and periods
+    const orderedPeriods = data.periods;
     console.log('Periods being used for display:', orderedPeriods);
 
     // Create grades table
-    const gradesTable = createGradesTable(data.grades, orderedPeriods);
+    const gradesTable = createGradesTable(data.classes, data.grades, orderedPeriods);
     document.getElementById('grades-table').innerHTML = gradesTable;
     
     // Get current (most recent) GPAs with fallback
     // Find the last period that has a GPA value
-    const currentPeriod = [...orderedPeriods]
-        .reverse()
-        .find(period => data.unweighted_gpas[period] !== undefined);
-    console.log('Current period:', currentPeriod);
-    const currentUnweightedGPA = data.unweighted_gpas[currentPeriod] || 0;
-    const currentWeightedGPA = data.weighted_gpas[currentPeriod] || 0;
+    const currentIndex = data.unweighted_gpas.findLastIndex(gpa => gpa !== null);
+    console.log('Current period:', orderedPeriods[currentIndex]);
+    const currentUnweightedGPA = data.unweighted_gpas[currentIndex] || 0;
+    const currentWeightedGPA = data.weighted_gpas[currentIndex] || 0;
     console.log('Current GPAs:', { unweighted: currentUnweightedGPA, weighted: currentWeightedGPA });
 
     // Create current GPA section
@@ -165,31 +265,32 @@ function displayResults(data) {
     const weightedTable = createGPATable(data.weighted_gpas, orderedPeriods);
     document.getElementById('weighted-table').innerHTML = weightedTable;
 
+    // Past scrapes come from the server's snapshot store, no Skyward round trip
+    loadHistory(data.sim_token);
+
     // Add graph
     const ctx = document.getElementById('weighted-chart').getContext('2d');
     const weightedGPAs = orderedPeriods
-        .filter(period => data.weighted_gpas[period] !== undefined)
-        .map(period => ({
+        .map((period, index) => ({
             x: period,
-            y: data.weighted_gpas[period]
-        }));
+            y: data.weighted_gpas[index]
+        }))
+        .filter(point => point.y !== null);
 
-    // Calculate maximum possible GPA based on actual class composition
-    const maxPossibleGPA = Object.keys(data.grades).reduce((sum, className) => {
-        if ((className.includes("AP") && !className.includes("APA")) || className.includes("Ind Study Tech Applications")) {
-            return sum + 8.0;  // AP class
-        } else if (className.includes("APA") || className.includes("Academic Dec 1")) {
-            return sum + 7.0;  // APA class
-        }
-        return sum + 6.0;  // Regular class
-    }, 0) / Object.keys(data.grades).length;  // Divide by total number of classes
+    // Maximum possible GPA is the average base GPA the server's weighting rules gave each class
+    // A class without a weight counts as regular (6.0) rather than 0
+    const maxPossibleGPA = data.course_weights.reduce((sum, weight) => sum + (weight ?? 6.0), 0)
+        / data.course_weights.length;  // Divide by total number of classes
 
     // Calculate y-axis bounds based on current GPA and maximum possible GPA
     const yMin = Math.floor(currentWeightedGPA - 0.5); // Round down to nearest whole number
     const maxValue = Math.max(...weightedGPAs.map(gpa => gpa.y), maxPossibleGPA);
     const yMax = Math.ceil(maxValue * 10) / 10; // Round up to nearest 0.1
 
-    new Chart(ctx, {
+    if (weightedChart) {
+        weightedChart.destroy();
+    }
+    weightedChart = new Chart(ctx, {
         type: 'line',
         data: {
             datasets: [
@@ -318,9 +419,95 @@ function displayResults(data) {
     });
 }
 
-function createGradesTable(grades, orderedPeriods) {
+let historyChart = null;
+
+async function loadHistory(token) {
+    const section = document.getElementById('history-section');
+    if (!token) {
+        section.classList.add('hidden');
+        return;
+    }
+    try {
+        const response = await fetch(`/history?token=${encodeURIComponent(token)}`);
+        if (!response.ok) {
+            throw new Error(`History request failed with ${response.status}`);
+        }
+        const history = await response.json();
+        // A single point is just today's GPA, already shown above
+        if (history.labels.length < 2) {
+            section.classList.add('hidden');
+            return;
+        }
+        section.classList.remove('hidden');
+
+        if (historyChart) {
+            historyChart.destroy();
+        }
+        historyChart = new Chart(document.getElementById('history-chart').getContext('2d'), {
+            type: 'line',
+            data: {
+                labels: history.labels,
+                datasets: [
+                    {
+                        label: 'Weighted GPA',
+                        data: history.weighted,
+                        borderColor: '#A23422',
+                        backgroundColor: 'rgba(162, 52, 34, 0.1)',
+                        borderWidth: 3,
+                        tension: 0.3,
+                        pointRadius: 4
+                    },
+                    {
+                        label: 'Unweighted GPA',
+                        data: history.unweighted,
+                        borderColor: '#1C3764',
+                        borderWidth: 2,
+                        tension: 0.3,
+                        pointRadius: 3
+                    }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                interaction: {
+                    intersect: false,
+                    mode: 'index'
+                },
+                plugins: {
+                    tooltip: {
+                        callbacks: {
+                            label: function(context) {
+                                return `${context.dataset.label}: ${context.parsed.y.toFixed(2)}`;
+                            }
+                        }
+                    }
+                },
+                scales: {
+                    y: {
+                        ticks: {
+                            callback: function(value) {
+                                return value.toFixed(2);
+                            }
+                        }
+                    },
+                    x: {
+                        grid: {
+                            display: false
+                        }
+                    }
+                }
+            }
+        });
+    } catch (error) {
+        console.error('Error loading GPA history:', error);
+        section.classList.add('hidden');
+    }
+}
+
+function createGradesTable(classes, grades, orderedPeriods) {
     console.log('Creating grades table with periods:', orderedPeriods);
-    if (!grades || Object.keys(grades).length === 0) {
+    if (!classes || classes.length === 0) {
         return '<p class="text-gray-500">No grades available</p>';
     }
 
@@ -339,14 +526,14 @@ function createGradesTable(grades, orderedPeriods) {
                 </tr>
             </thead>
             <tbody class="bg-white divide-y divide-gray-200">
-                ${Object.entries(grades).map(([className, classGrades]) => `
+                ${classes.map((className, row) => `
                     <tr>
                         <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
                             ${className}
                         </td>
-                        ${orderedPeriods.map(period => `
+                        ${grades[row].map(grade => `
                             <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                ${classGrades[period] ? classGrades[period].toFixed(1) : '-'}
+                                ${grade ? grade.toFixed(1) : '-'}
                             </td>
                         `).join('')}
                     </tr>
@@ -359,7 +546,7 @@ function createGradesTable(grades, orderedPeriods) {
 function createGPATable(gpas, orderedPeriods) {
     console.log('Creating GPA table with periods:', orderedPeriods);
     console.log('GPA data:', gpas);
-    if (!gpas || Object.keys(gpas).length === 0) {
+    if (!gpas || gpas.every(gpa => gpa === null)) {
         return '<p class="text-gray-500">No GPA data available</p>';
     }
 
@@ -376,16 +563,16 @@ function createGPATable(gpas, orderedPeriods) {
                 </tr>
             </thead>
             <tbody class="bg-white divide-y divide-gray-200">
-                ${orderedPeriods.map(period => {
+                ${orderedPeriods.map((period, index) => {
                     // Only create a row if the GPA exists for this period
-                    if (gpas[period] !== undefined) {
+                    if (gpas[index] !== null) {
                         return `
                             <tr>
                                 <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
                                     ${period}
                                 </td>
                                 <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                    ${gpas[period].toFixed(2)}
+                                    ${gpas[index].toFixed(2)}
                                 </td>
                             </tr>
                         `;
@@ -0,0 +1,193 @@
+from utils.store import get_store, _pid_alive
+from utils.runtime import available_memory_mb
+import math
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS admission_tickets (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL
+);
+CREATE INDEX IF NOT EXISTS admission_tickets_created ON admission_tickets (created_at);
+CREATE TABLE IF NOT EXISTS admission_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    avg_seconds REAL NOT NULL
+);
+"""
+
+
+class AdmissionController:
+    """Global FIFO of scrapes with a fixed number of browser slots, shared by every worker
+
+    Tickets are 'held' while the job sits in its worker's executor backlog,
+    'waiting' once a thread polls acquire() for a slot, then 'running'. Only
+    waiting tickets take a place in the line, so a backlog on one worker
+    cannot block free slots for another.
+    """
+
+    def __init__(self, store=None, slots=None, max_queue=None, min_free_mb=None, wait_timeout=None,
+                 poll_interval=0.5):
+        self.store = store or get_store()
+        self.slots = slots or int(os.environ.get('ADMISSION_SLOTS', 4))
+        self.max_queue = max_queue if max_queue is not None else int(os.environ.get('ADMISSION_QUEUE_SIZE', 40))
+        self.min_free_mb = min_free_mb if min_free_mb is not None else int(
+            os.environ.get('ADMISSION_MIN_FREE_MB', 512))
+        self.wait_timeout = wait_timeout if wait_timeout is not None else int(
+            os.environ.get('ADMISSION_WAIT_TIMEOUT', 300))
+        self.poll_interval = poll_interval
+        self.store.connect().executescript(SCHEMA)
+
+    def enqueue(self, ticket_id):
+        """Reserve a place for a job that has not reached an executor thread yet; returns False when full"""
+        conn = self.store.connect()
+        self._drop_dead_tickets()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            queued = conn.execute("SELECT COUNT(*) FROM admission_tickets WHERE state != 'running'").fetchone()[0]
+            if queued >= self.max_queue:
+                return False
+            conn.execute(
+                "INSERT INTO admission_tickets (id, state, pid, created_at) VALUES (?, 'held', ?, ?)",
+                (ticket_id, os.getpid(), time.time())
+            )
+        return True
+
+    def acquire(self, ticket_id, on_wait=None):
+        """Join the line and block until the ticket gets a slot, calling on_wait(position) as its place changes"""
+        conn = self.store.connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Joining now rather than at enqueue keeps the line to tickets someone is actually polling
+            conn.execute("UPDATE admission_tickets SET state = 'waiting', created_at = ? WHERE id = ? AND state = 'held'",
+                         (time.time(), ticket_id))
+        deadline = time.monotonic() + self.wait_timeout
+        last_position = None
+        while True:
+            position = self._try_start(ticket_id)
+            if position == 0:
+                return
+            if position != last_position and on_wait:
+                on_wait(position)
+            last_position = position
+            if time.monotonic() > deadline:
+                self.release(ticket_id)
+                raise Exception("The server is busy right now, please try again in a minute")
+            time.sleep(self.poll_interval)
+
+    def release(self, ticket_id):
+        """Give up the ticket's slot or place in line"""
+        conn = self.store.connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT started_at FROM admission_tickets WHERE id = ?', (ticket_id,)).fetchone()
+            conn.execute('DELETE FROM admission_tickets WHERE id = ?', (ticket_id,))
+            if row and row['started_at']:
+                # Moving average of scrape time, for Retry-After estimates
+                conn.execute(
+                    'INSERT INTO admission_stats (id, avg_seconds) VALUES (1, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET avg_seconds = avg_seconds * 0.8 + excluded.avg_seconds * 0.2',
+                    (time.time() - row['started_at'],)
+                )
+
+    def position(self, ticket_id):
+        """1-based place in line, 0 once running, or None if the ticket is unknown"""
+        conn = self.store.connect()
+        row = conn.execute(
+            'SELECT state, pid, created_at FROM admission_tickets WHERE id = ?', (ticket_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row['state'] == 'running':
+            return 0
+        if row['state'] == 'held':
+            # Behind everyone already waiting, and behind its own worker's earlier backlog
+            waiting = conn.execute("SELECT COUNT(*) FROM admission_tickets WHERE state = 'waiting'").fetchone()[0]
+            held_ahead = conn.execute(
+                "SELECT COUNT(*) FROM admission_tickets WHERE state = 'held' AND pid = ? AND created_at < ?",
+                (row['pid'], row['created_at'])
+            ).fetchone()[0]
+            return waiting + held_ahead + 1
+        return self._waiting_ahead(conn, row['created_at']) + 1
+
+    def retry_after(self):
+        """Seconds until the queue has likely drained enough to accept another request"""
+        conn = self.store.connect()
+        queued = conn.execute("SELECT COUNT(*) FROM admission_tickets WHERE state != 'running'").fetchone()[0]
+        row = conn.execute('SELECT avg_seconds FROM admission_stats WHERE id = 1').fetchone()
+        average = row['avg_seconds'] if row else 30.0
+        return max(1, math.ceil((queued - self.max_queue + 1) / self.slots * average))
+
+    def stats(self):
+        """Slots in use, queue length and the memory available for new browsers"""
+        conn = self.store.connect()
+        counts = {row['state']: row['n'] for row in conn.execute(
+            'SELECT state, COUNT(*) AS n FROM admission_tickets GROUP BY state'
+        ).fetchall()}
+        return {
+            'slots': self.slots,
+            'running': counts.get('running', 0),
+            'waiting': counts.get('waiting', 0),
+            'held': counts.get('held', 0),
+            'max_queue': self.max_queue,
+            'available_mb': available_memory_mb(),
+            'min_free_mb': self.min_free_mb,
+        }
+
+    def _waiting_ahead(self, conn, created_at):
+        return conn.execute(
+            "SELECT COUNT(*) FROM admission_tickets WHERE state = 'waiting' AND created_at < ?", (created_at,)
+        ).fetchone()[0]
+
+    def _try_start(self, ticket_id):
+        """Start the ticket if a slot is free for it; returns 0 when started, else its place in line"""
+        self._drop_dead_tickets()
+        conn = self.store.connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT state, created_at FROM admission_tickets WHERE id = ?',
+                               (ticket_id,)).fetchone()
+            if row is None:
+                raise Exception("Lost place in the queue, please try again")
+            if row['state'] == 'running':
+                return 0
+            ahead = self._waiting_ahead(conn, row['created_at'])
+            running = conn.execute("SELECT COUNT(*) FROM admission_tickets WHERE state = 'running'").fetchone()[0]
+            if ahead >= self.slots - running:
+                return ahead + 1
+            # Always let one scrape run so low memory cannot stall the queue forever
+            available = available_memory_mb()
+            if running and available is not None and available < self.min_free_mb:
+                logger.info(f"Holding scrape back: {available:.0f}MB available, need {self.min_free_mb}MB")
+                return ahead + 1
+            conn.execute("UPDATE admission_tickets SET state = 'running', started_at = ? WHERE id = ?",
+                         (time.time(), ticket_id))
+        return 0
+
+    def _drop_dead_tickets(self):
+        conn = self.store.connect()
+        pids = [row['pid'] for row in conn.execute('SELECT DISTINCT pid FROM admission_tickets').fetchall()]
+        for pid in pids:
+            if not _pid_alive(pid):
+                logger.warning(f"Dropping admission tickets of dead worker {pid}")
+                conn.execute('DELETE FROM admission_tickets WHERE pid = ?', (pid,))
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Return the per-process handle on the global admission queue"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
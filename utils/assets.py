@@ -0,0 +1,55 @@
+from utils.payload import accepts_encoding
+import json
+import mimetypes
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = os.path.join('static', 'dist')
+MANIFEST_NAME = 'manifest.json'
+# Hashed names change with their content, so browsers never need to ask again
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Best first; the variants are written by build_assets.py
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+class AssetManifest:
+    """Hashed file names from build_assets.py, and which precompressed variant to send"""
+
+    def __init__(self, root):
+        self.directory = os.path.join(root, DIST_DIR)
+        self.files = {}
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.files = json.load(f)
+            logger.info(f"Serving {len(self.files)} built assets from {self.directory}")
+        self._served = set(self.files.values())
+
+    def __bool__(self):
+        return bool(self.files)
+
+    def pick(self, filename, accept_encoding):
+        """(file to send, mimetype, content encoding) for a hashed name, or None if it is not ours"""
+        if filename not in self._served:
+            return None
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in ENCODINGS:
+            if accepts_encoding(accept_encoding, encoding) and os.path.exists(os.path.join(self.directory, filename + suffix)):
+                return filename + suffix, mimetype, encoding
+        return filename, mimetype, None
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_asset_manifest(root):
+    """Return the manifest of the last asset build, loaded once per process"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = AssetManifest(root)
+        return _manifest
@@ -0,0 +1,80 @@
+from utils.security import user_key, make_verifier, check_verifier
+from utils.store import get_store
+import json
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    user_key TEXT PRIMARY KEY,
+    verifier TEXT NOT NULL,
+    result TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    refreshing_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_fetched ON results (fetched_at);
+"""
+
+
+class ResultCache:
+    """Recent scrape results keyed by a salted username hash, served stale-while-revalidate"""
+
+    def __init__(self, store=None, ttl=None, max_stale=None, refresh_timeout=None):
+        self.store = store or get_store()
+        self.ttl = ttl if ttl is not None else int(os.environ.get('CACHE_TTL', 900))
+        self.max_stale = max_stale if max_stale is not None else int(os.environ.get('CACHE_MAX_STALE', 86400))
+        self.refresh_timeout = refresh_timeout if refresh_timeout is not None else int(
+            os.environ.get('CACHE_REFRESH_TIMEOUT', 300))
+        self.store.connect().executescript(SCHEMA)
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, username, password):
+        """Return (result, age_seconds, is_fresh), or None on a miss"""
+        if not self.enabled:
+            return None
+        row = self.store.connect().execute(
+            'SELECT verifier, result, fetched_at FROM results WHERE user_key = ?', (user_key(username),)
+        ).fetchone()
+        if row is None:
+            return None
+        age = time.time() - row['fetched_at']
+        if age > self.max_stale:
+            return None
+        # Only the person who knows the password may read the cached grades
+        if not check_verifier(password, row['verifier']):
+            return None
+        return json.loads(row['result']), age, age <= self.ttl
+
+    def put(self, username, password, result):
+        """Store a fresh result; the password is kept only as a salted verifier"""
+        if not self.enabled:
+            return
+        now = time.time()
+        conn = self.store.connect()
+        conn.execute(
+            'INSERT INTO results (user_key, verifier, result, fetched_at, refreshing_until) VALUES (?, ?, ?, ?, 0) '
+            'ON CONFLICT (user_key) DO UPDATE SET verifier = excluded.verifier, result = excluded.result, '
+            'fetched_at = excluded.fetched_at, refreshing_until = 0',
+            (user_key(username), make_verifier(password), json.dumps(result), now)
+        )
+        conn.execute('DELETE FROM results WHERE fetched_at < ?', (now - self.max_stale,))
+
+    def claim_refresh(self, username):
+        """Return True if this caller should run the background refresh (one per user across workers)"""
+        now = time.time()
+        cursor = self.store.connect().execute(
+            'UPDATE results SET refreshing_until = ? WHERE user_key = ? AND refreshing_until < ?',
+            (now + self.refresh_timeout, user_key(username), now)
+        )
+        return cursor.rowcount == 1
+
+    def release_refresh(self, username):
+        self.store.connect().execute(
+            'UPDATE results SET refreshing_until = 0 WHERE user_key = ?', (user_key(username),)
+        )
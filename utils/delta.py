@@ -0,0 +1,126 @@
+from utils.security import user_key
+from utils.store import get_store
+import hashlib
+import json
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS grade_versions (
+    user_key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (user_key, version)
+);
+CREATE INDEX IF NOT EXISTS grade_versions_created ON grade_versions (created_at);
+"""
+
+
+def row_hash(class_grades):
+    """Content hash of one class row"""
+    return hashlib.sha1(json.dumps(sorted(class_grades.items())).encode()).hexdigest()[:16]
+
+
+def row_hashes(grades_raw):
+    return {class_name: row_hash(class_grades) for class_name, class_grades in grades_raw.items()}
+
+
+def version_token(result):
+    """Token identifying the grade content of a result"""
+    digest = hashlib.sha1()
+    for class_name, value in sorted(row_hashes(result['grades_raw']).items()):
+        digest.update(f"{class_name}\0{value}\n".encode())
+    digest.update('|'.join(result['ordered_periods']).encode())
+    return digest.hexdigest()[:16]
+
+
+def affected_periods(previous, grades, ordered_periods):
+    """Periods whose GPAs may differ from previous, or None if everything must be recomputed"""
+    if previous['ordered_periods'] != ordered_periods or set(previous['grades']) != set(grades):
+        return None
+    periods = set()
+    for class_name, class_grades in grades.items():
+        old_grades = previous['grades'][class_name]
+        for period in set(class_grades) | set(old_grades):
+            if class_grades.get(period) != old_grades.get(period):
+                periods.add(period)
+    return periods
+
+
+def build_delta(previous, result):
+    """Only the classes and period GPAs that changed since previous"""
+    old_hashes = row_hashes(previous['grades_raw'])
+    new_hashes = row_hashes(result['grades_raw'])
+    changed = [class_name for class_name, value in new_hashes.items() if old_hashes.get(class_name) != value]
+
+    delta = {
+        'delta': True,
+        'base_version': previous['version'],
+        'version': result['version'],
+        'ordered_periods': result['ordered_periods'],
+        'course_weights': result.get('course_weights', {}),
+        'grades_raw': {class_name: result['grades_raw'][class_name] for class_name in changed},
+        'grades': {class_name: result['grades'][class_name] for class_name in changed
+                   if class_name in result['grades']},
+        'removed_classes': [class_name for class_name in old_hashes if class_name not in new_hashes],
+    }
+    for key in ('unweighted_gpas', 'weighted_gpas'):
+        delta[key] = {period: gpa for period, gpa in result[key].items() if previous[key].get(period) != gpa}
+    delta['removed_gpas'] = [period for period in previous['unweighted_gpas'] if period not in result['unweighted_gpas']]
+    # Classes still present whose filtered grades vanished
+    delta['removed_classes'] += [class_name for class_name in changed
+                                 if class_name in previous['grades'] and class_name not in result['grades']]
+    if 'assignments' in result:
+        # Assignments can change without any period average moving, so send them whole
+        delta['assignments'] = result['assignments']
+    return delta
+
+
+class DeltaTracker:
+    """Recent result versions per user, so refreshes can send only what changed"""
+
+    def __init__(self, store=None, keep=None, max_age=None):
+        self.store = store or get_store()
+        self.keep = keep or int(os.environ.get('DELTA_VERSIONS', 5))
+        # A cached result up to CACHE_MAX_STALE old can still hand out a sim_token valid for SIM_TOKEN_TTL
+        self.max_age = max_age if max_age is not None else int(os.environ.get('DELTA_MAX_AGE', 172800))
+        self.store.connect().executescript(SCHEMA)
+
+    def load(self, username, version):
+        """Return the full result for a version the user was sent before, or None"""
+        return self.load_by_key(user_key(username), version)
+
+    def load_by_key(self, key, version):
+        """Like load(), for callers that only hold the user's key"""
+        if not version:
+            return None
+        row = self.store.connect().execute(
+            'SELECT result FROM grade_versions WHERE user_key = ? AND version = ? AND created_at >= ?',
+            (key, version, time.time() - self.max_age)
+        ).fetchone()
+        return json.loads(row['result']) if row else None
+
+    def record(self, username, result):
+        """Stamp result with its version token and remember it"""
+        result['version'] = version_token(result)
+        key = user_key(username)
+        now = time.time()
+        conn = self.store.connect()
+        conn.execute(
+            'INSERT INTO grade_versions (user_key, version, result, created_at) VALUES (?, ?, ?, ?) '
+            # Same grades can still come with new assignments or course weights, so keep the latest result
+            'ON CONFLICT (user_key, version) DO UPDATE SET result = excluded.result, created_at = excluded.created_at',
+            (key, result['version'], json.dumps(result), now)
+        )
+        conn.execute(
+            'DELETE FROM grade_versions WHERE user_key = ? AND version NOT IN '
+            '(SELECT version FROM grade_versions WHERE user_key = ? ORDER BY created_at DESC LIMIT ?)',
+            (key, key, self.keep)
+        )
+        # Students who stopped logging in would otherwise keep their grades here forever
+        conn.execute('DELETE FROM grade_versions WHERE created_at < ?', (now - self.max_age,))
+        return result['version']
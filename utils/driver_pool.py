@@ -0,0 +1,332 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from utils.runtime import get_supervisor, headless, CHROMEDRIVER_PATH, CHROME_PATH, MANAGED_FLAG
+from utils.metrics import get_metrics, STAGE_METRIC
+import atexit
+import functools
+import os
+import threading
+import time
+import traceback
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resources the scraper never reads. Stylesheets and first-party scripts stay
+# allowed: visibility checks and the login form depend on them.
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp3', '*.mp4', '*.webm', '*.pdf',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*hotjar.com*', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+]
+
+# Chrome features with no use in a scraping session
+LEAN_ARGUMENTS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+]
+
+
+def lean_profile():
+    return os.environ.get('BROWSER_PROFILE', 'lean').lower() == 'lean'
+
+
+def blocked_url_patterns():
+    """Blocked URL patterns, minus BROWSER_ALLOW_URLS and plus BROWSER_BLOCK_URLS"""
+    allowed = {pattern.strip() for pattern in os.environ.get('BROWSER_ALLOW_URLS', '').split(',')}
+    extra = [pattern.strip() for pattern in os.environ.get('BROWSER_BLOCK_URLS', '').split(',') if pattern.strip()]
+    return [pattern for pattern in BLOCKED_URL_PATTERNS + extra if pattern not in allowed]
+
+
+def apply_lean_profile(driver):
+    """Block heavy resources in the current window; needed again after switching to a new window"""
+    if not lean_profile():
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns()})
+    except Exception as e:
+        logger.warning(f"Failed to apply lean browsing profile: {str(e)}")
+
+
+def create_driver():
+    """Launch a new Chrome driver with the production options"""
+    try:
+        # Set up Chrome options
+        options = webdriver.ChromeOptions()
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-infobars')
+        options.add_argument('--disable-notifications')
+        options.add_argument('--disable-popup-blocking')
+        options.add_argument('--ignore-certificate-errors')
+        options.add_argument('--window-size=1920,1080')
+        options.add_argument(MANAGED_FLAG)
+
+        if lean_profile():
+            # Return from navigation at DOMContentLoaded; the scraper waits for the elements it needs
+            options.page_load_strategy = 'eager'
+            for argument in LEAN_ARGUMENTS:
+                options.add_argument(argument)
+
+        # Only run headless on production (Render) or when explicitly set
+        # Set HEADLESS=false to debug visually
+        if headless():
+            options.add_argument('--headless=new')
+        else:
+            logger.info("Running in NON-HEADLESS mode for debugging")
+            get_supervisor().ensure_display()
+
+        # Use system chromedriver (installed by Dockerfile)
+        logger.info(f"Using system chromedriver at: {CHROMEDRIVER_PATH}")
+        service = ChromeService(CHROMEDRIVER_PATH)
+        # Set Chrome binary location
+        options.binary_location = CHROME_PATH
+
+        driver = webdriver.Chrome(service=service, options=options)
+        apply_lean_profile(driver)
+        return driver
+    except Exception as e:
+        logger.error(f"Failed to initialize Chrome driver: {str(e)}")
+        logger.error(f"Chrome driver traceback: {traceback.format_exc()}")
+        raise Exception(
+            f"Failed to initialize Chrome driver: {str(e)}"
+        )
+
+
+class DriverPool:
+    """Pool of warm Chrome drivers shared by all requests in a worker"""
+
+    def __init__(self, size=None, max_uses=None, checkout_timeout=None, factory=create_driver):
+        # No worker can run more browsers at once than admission hands out slots
+        self.size = size if size is not None else min(int(os.environ.get('DRIVER_POOL_SIZE', 2)),
+                                                      int(os.environ.get('ADMISSION_SLOTS', 4)))
+        self.max_uses = max_uses if max_uses is not None else int(os.environ.get('DRIVER_MAX_USES', 25))
+        self.checkout_timeout = checkout_timeout if checkout_timeout is not None else float(
+            os.environ.get('DRIVER_CHECKOUT_TIMEOUT', 60))
+        self.factory = factory
+        self._cond = threading.Condition()
+        self._idle = []
+        self._uses = {}
+        self._dead = set()
+        self._total = 0
+        self._closed = False
+        self._counters = {
+            'created': 0,
+            'recycled': 0,
+            'discarded': 0,
+            'checkouts': 0,
+            'warm_hits': 0,
+            'wait_seconds': 0.0,
+        }
+
+    def warm(self, count=None, background=True):
+        """Pre-spawn drivers until the pool holds count of them (default: full)"""
+        target = self.size if count is None else min(count, self.size)
+
+        def fill():
+            while True:
+                with self._cond:
+                    if self._closed or self._total >= target:
+                        return
+                    self._total += 1
+                try:
+                    driver = self._spawn()
+                except Exception:
+                    return
+                with self._cond:
+                    self._idle.append(driver)
+                    self._cond.notify()
+                self._publish()
+
+        if background:
+            threading.Thread(target=fill, name='driver-pool-warm', daemon=True).start()
+        else:
+            fill()
+
+    def checkout(self):
+        """Borrow a driver, launching one if the pool has spare capacity"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise Exception("Driver pool is shut down")
+                    if self._idle:
+                        driver = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        self._total += 1
+                        driver = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception("Timed out waiting for a free browser - the server is busy, please try again")
+                    self._cond.wait(remaining)
+            if driver is None:
+                driver = self._spawn()
+                break
+            if self._alive(driver):
+                with self._cond:
+                    self._counters['warm_hits'] += 1
+                break
+            # Chrome crashed or was killed while idle; free its slot and try again
+            logger.warning("Idle driver is no longer responding, replacing it")
+            self._discard(driver)
+
+        with self._cond:
+            self._counters['checkouts'] += 1
+            self._counters['wait_seconds'] += time.monotonic() - started
+        get_metrics().observe(STAGE_METRIC, time.monotonic() - started, stage='driver_checkout', outcome='ok')
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        self._publish()
+        return driver
+
+    def release(self, driver, discard=False):
+        """Return a driver to the pool, recycling it if it is worn out or broken"""
+        if discard or self._closed or id(driver) in self._dead:
+            self._discard(driver)
+            return
+        if self._uses.get(id(driver), 0) >= self.max_uses:
+            logger.info("Recycling driver after reaching max uses")
+            with self._cond:
+                self._counters['recycled'] += 1
+            self._discard(driver)
+            return
+        try:
+            self._reset(driver)
+        except Exception as e:
+            logger.warning(f"Driver failed to reset, discarding it: {str(e)}")
+            self._discard(driver)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+        self._publish()
+
+    def evict(self, driver):
+        """Forget a driver whose browser was killed: now if idle, otherwise when it is released"""
+        with self._cond:
+            idle = driver in self._idle
+            if idle:
+                self._idle.remove(driver)
+            elif id(driver) in self._uses:
+                self._dead.add(id(driver))
+        if idle:
+            self._discard(driver)
+
+    def stats(self):
+        """Snapshot of pool size and utilization"""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update({
+                'size': self.size,
+                'max_uses': self.max_uses,
+                'total': self._total,
+                'idle': len(self._idle),
+                'in_use': self._total - len(self._idle),
+            })
+        stats['utilization'] = stats['in_use'] / self.size if self.size else 0.0
+        return stats
+
+    def close(self):
+        """Quit every idle driver and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._discard(driver)
+
+    def _spawn(self):
+        try:
+            logger.info("Initializing Chrome driver...")
+            with get_metrics().timer('driver_create'):
+                driver = self.factory()
+            get_supervisor().track(driver, on_kill=functools.partial(self.evict, driver))
+            logger.info("Chrome driver initialized successfully")
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters['created'] += 1
+        return driver
+
+    def _alive(self, driver):
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        # Wipe everything the previous user left behind
+        origins = set()
+        handles = driver.window_handles
+        # sessionStorage lives in the tab and survives clearDataForOrigin, so
+        # the next user gets a new tab and every old one is closed
+        driver.switch_to.new_window('tab')
+        fresh = driver.current_window_handle
+        for handle in handles:
+            driver.switch_to.window(handle)
+            origins.add(driver.execute_script("return window.location.origin"))
+            driver.close()
+        driver.switch_to.window(fresh)
+        for origin in origins:
+            if origin and origin.startswith('http'):
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        # Request blocking is set per tab
+        apply_lean_profile(driver)
+
+    def _discard(self, driver):
+        self._uses.pop(id(driver), None)
+        with self._cond:
+            self._dead.discard(id(driver))
+        supervisor = get_supervisor()
+        pids = supervisor.untrack(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing driver: {str(e)}")
+        supervisor.kill_leftovers(pids)
+        with self._cond:
+            self._total -= 1
+            self._counters['discarded'] += 1
+            self._cond.notify()
+        self._publish()
+
+    def _publish(self):
+        # Browser counts for /metrics, summed over workers
+        stats = self.stats()
+        metrics = get_metrics()
+        metrics.set_gauge('skyward_browsers', stats['in_use'], state='in_use')
+        metrics.set_gauge('skyward_browsers', stats['idle'], state='idle')
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """Return the per-process driver pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            atexit.register(_pool.close)
+        return _pool
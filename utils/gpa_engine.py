@@ -0,0 +1,125 @@
+from utils.weighting import get_weighting_rules
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:  # Fall back to the pure Python loop
+    np = None
+
+# Grading periods in school-year order
+PERIOD_ORDER = ['1U1', '1U2', 'NW1', '2U1', '2U2', 'NW2', 'EX1', 'SM1',
+                '3U1', '3U2', 'NW3', '4U1', '4U2', 'NW4', 'EX2', 'SM2', 'YR']
+
+
+def course_weights(class_names, rules=None):
+    """Weighted base GPA of each course, as sent to the frontend"""
+    rules = rules or get_weighting_rules()
+    return {class_name: rules.base_gpa(class_name) for class_name in class_names}
+
+
+def build_matrix(grades, periods):
+    """Dense classes x periods grade matrix with a mask of which grades exist"""
+    classes = list(grades)
+    column = {period: index for index, period in enumerate(periods)}
+    matrix = np.zeros((len(classes), len(periods)))
+    mask = np.zeros((len(classes), len(periods)), dtype=bool)
+    for row, class_name in enumerate(classes):
+        for period, grade in grades[class_name].items():
+            if period in column:
+                matrix[row, column[period]] = grade
+                mask[row, column[period]] = True
+    return classes, matrix, mask
+
+
+def compute_batch(students, rules=None):
+    """Unweighted and weighted period GPAs for many (grades, periods) pairs at once
+
+    A period only gets a GPA when every class has a grade for it.
+    Returns a list of (unweighted_gpas, weighted_gpas) dicts in input order.
+    """
+    rules = rules or get_weighting_rules()
+    if np is None:
+        return [_compute_python(grades, periods, rules) for grades, periods in students]
+    if not students:
+        return []
+
+    max_classes = max(len(grades) for grades, _ in students) or 1
+    max_periods = max(len(periods) for _, periods in students) or 1
+    shape = (len(students), max_classes, max_periods)
+    matrix = np.zeros(shape)
+    mask = np.zeros(shape, dtype=bool)
+    present = np.zeros(shape[:2], dtype=bool)
+    base = np.zeros(shape[:2])
+    step = np.zeros(shape[:2])
+
+    for index, (grades, periods) in enumerate(students):
+        classes, student_matrix, student_mask = build_matrix(grades, periods)
+        rows, cols = student_matrix.shape
+        matrix[index, :rows, :cols] = student_matrix
+        mask[index, :rows, :cols] = student_mask
+        present[index, :rows] = True
+        weights = [rules.classify(class_name) for class_name in classes]
+        base[index, :rows] = [weight.base for weight in weights]
+        step[index, :rows] = [weight.step for weight in weights]
+
+    class_counts = present.sum(axis=1)
+    complete = (mask | ~present[:, :, None]).all(axis=1) & (class_counts > 0)[:, None]
+    points_lost = np.where(mask, 100 - matrix, 0.0)
+    divisor = np.maximum(class_counts, 1)[:, None]
+    unweighted = (rules.unweighted_base * class_counts[:, None] - points_lost.sum(axis=1) * rules.step) / divisor
+    weighted = (base.sum(axis=1)[:, None] - (points_lost * step[:, :, None]).sum(axis=1)) / divisor
+
+    results = []
+    for index, (_, periods) in enumerate(students):
+        unweighted_gpas = {}
+        weighted_gpas = {}
+        for col, period in enumerate(periods):
+            if complete[index, col]:
+                unweighted_gpas[period] = float(unweighted[index, col])
+                weighted_gpas[period] = float(weighted[index, col])
+        results.append((unweighted_gpas, weighted_gpas))
+    return results
+
+
+def compute_gpas(grades, periods, rules=None):
+    """Unweighted and weighted period GPAs for one student"""
+    return compute_batch([(grades, periods)], rules)[0]
+
+
+def apply_overrides(grades, periods, overrides):
+    """Copy of grades with {class: {period: grade or None}} overrides; None drops a grade"""
+    simulated = {class_name: dict(class_grades) for class_name, class_grades in grades.items()}
+    for class_name, class_overrides in overrides.items():
+        if class_name not in simulated:
+            raise ValueError(f"Unknown class: {class_name}")
+        if not isinstance(class_overrides, dict):
+            raise ValueError(f"Overrides for {class_name} must map periods to grades")
+        for period, grade in class_overrides.items():
+            if period not in periods:
+                raise ValueError(f"Unknown grading period: {period}")
+            if grade is None:
+                simulated[class_name].pop(period, None)
+            elif isinstance(grade, (int, float)) and not isinstance(grade, bool) and 0 <= grade <= 110:
+                simulated[class_name][period] = float(grade)
+            else:
+                raise ValueError(f"Grade for {class_name} {period} must be a number from 0 to 110")
+    return simulated
+
+
+def _compute_python(grades, periods, rules=None):
+    rules = rules or get_weighting_rules()
+    unweighted_gpas = {}
+    weighted_gpas = {}
+    weights = {class_name: rules.classify(class_name) for class_name in grades}
+    total_base = sum(weight.base for weight in weights.values())
+    for period in periods:
+        if not grades or any(period not in class_grades for class_grades in grades.values()):
+            continue
+        points_lost = {class_name: 100 - class_grades[period] for class_name, class_grades in grades.items()}
+        unweighted_gpas[period] = (rules.unweighted_base * len(grades)
+                                   - sum(points_lost.values()) * rules.step) / len(grades)
+        weighted_gpas[period] = (total_base - sum(lost * weights[class_name].step
+                                                  for class_name, lost in points_lost.items())) / len(grades)
+    return unweighted_gpas, weighted_gpas
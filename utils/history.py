@@ -0,0 +1,135 @@
+from utils.security import user_key
+from utils.store import get_store
+from utils.gpa_engine import PERIOD_ORDER
+import datetime
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Clustered on the primary key, so reading one user's history is a range scan
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gpa_history (
+    user_key TEXT NOT NULL,
+    school_year TEXT NOT NULL,
+    period TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    unweighted REAL,
+    weighted REAL,
+    PRIMARY KEY (user_key, school_year, period, recorded_at)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS grade_history (
+    user_key TEXT NOT NULL,
+    school_year TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    period TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    grade REAL NOT NULL,
+    PRIMARY KEY (user_key, school_year, class_name, period, recorded_at)
+) WITHOUT ROWID;
+"""
+
+# Newest row per series; the correlated MAX uses the primary key
+LATEST_GPAS = """
+SELECT school_year, period, recorded_at, unweighted, weighted FROM gpa_history h
+WHERE user_key = ? AND recorded_at = (
+    SELECT MAX(recorded_at) FROM gpa_history
+    WHERE user_key = h.user_key AND school_year = h.school_year AND period = h.period
+)
+"""
+LATEST_GRADES = """
+SELECT school_year, class_name, period, grade FROM grade_history h
+WHERE user_key = ? AND recorded_at = (
+    SELECT MAX(recorded_at) FROM grade_history
+    WHERE user_key = h.user_key AND school_year = h.school_year
+    AND class_name = h.class_name AND period = h.period
+)
+"""
+
+
+def school_year(timestamp):
+    """School year label such as '2025-26' for a timestamp"""
+    start_month = int(os.environ.get('SCHOOL_YEAR_START_MONTH', 8))
+    date = datetime.date.fromtimestamp(timestamp)
+    first = date.year if date.month >= start_month else date.year - 1
+    return f"{first}-{(first + 1) % 100:02d}"
+
+
+def _period_rank(period):
+    return PERIOD_ORDER.index(period) if period in PERIOD_ORDER else len(PERIOD_ORDER)
+
+
+class HistoryStore:
+    """Per-user GPA and grade snapshots, storing only values that changed since the last scrape"""
+
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        self.store.connect().executescript(SCHEMA)
+
+    def record(self, username, result, recorded_at=None):
+        """Append the parts of a calculate() result that differ from the latest snapshot"""
+        key = user_key(username)
+        recorded_at = recorded_at or time.time()
+        year = school_year(recorded_at)
+        conn = self.store.connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            latest_gpas = {(row['school_year'], row['period']): (row['unweighted'], row['weighted'])
+                           for row in conn.execute(LATEST_GPAS, (key,)).fetchall()}
+            latest_grades = {(row['school_year'], row['class_name'], row['period']): row['grade']
+                             for row in conn.execute(LATEST_GRADES, (key,)).fetchall()}
+
+            gpa_rows = []
+            for period, weighted in result['weighted_gpas'].items():
+                values = (round(result['unweighted_gpas'].get(period, 0.0), 4), round(weighted, 4))
+                if latest_gpas.get((year, period)) != values:
+                    gpa_rows.append((key, year, period, recorded_at) + values)
+            grade_rows = [(key, year, class_name, period, recorded_at, grade)
+                          for class_name, class_grades in result['grades'].items()
+                          for period, grade in class_grades.items()
+                          if latest_grades.get((year, class_name, period)) != grade]
+
+            conn.executemany('INSERT OR REPLACE INTO gpa_history VALUES (?, ?, ?, ?, ?, ?)', gpa_rows)
+            conn.executemany('INSERT OR REPLACE INTO grade_history VALUES (?, ?, ?, ?, ?, ?)', grade_rows)
+        if gpa_rows or grade_rows:
+            logger.info(f"Recorded {len(gpa_rows)} GPA and {len(grade_rows)} grade changes in history")
+
+    def series(self, key, include_classes=False):
+        """Latest GPA per school year and period, as parallel arrays ready for a chart"""
+        conn = self.store.connect()
+        points = sorted(
+            ({'school_year': row['school_year'], 'period': row['period'], 'recorded_at': row['recorded_at'],
+              'unweighted': row['unweighted'], 'weighted': row['weighted']}
+             for row in conn.execute(LATEST_GPAS, (key,)).fetchall()),
+            key=lambda point: (point['school_year'], _period_rank(point['period']))
+        )
+        history = {
+            'labels': [f"{point['school_year']} {point['period']}" for point in points],
+            'unweighted': [point['unweighted'] for point in points],
+            'weighted': [point['weighted'] for point in points],
+            'points': points,
+        }
+        if include_classes:
+            classes = {}
+            for row in conn.execute(LATEST_GRADES, (key,)).fetchall():
+                classes.setdefault(row['class_name'], []).append(
+                    {'school_year': row['school_year'], 'period': row['period'], 'grade': row['grade']})
+            for entries in classes.values():
+                entries.sort(key=lambda entry: (entry['school_year'], _period_rank(entry['period'])))
+            history['classes'] = classes
+        return history
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history_store():
+    """Return the per-process handle on the GPA history tables"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = HistoryStore()
+        return _history
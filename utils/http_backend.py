@@ -0,0 +1,349 @@
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
+import re
+import requests
+import logging
+
+logger = logging.getLogger(__name__)
+
+SKYWARD_BASE_URL = os.environ.get(
+    'SKYWARD_BASE_URL',
+    'https://skyward-alvinprod.iscorp.com/scripts/wsisa.dll/WService=wsedualvinisdtx'
+)
+
+# One connection pool shared by every per-user session in this process.
+# Sessions only hold cookies, so they must never be close()d - that would
+# close the shared adapter for everyone.
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=int(os.environ.get('SKYWARD_HTTP_POOL_SIZE', 16)),
+    max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=None),
+)
+# Credential posts are never retried: each attempt counts toward Skyward's lockout
+_login_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+
+# Grade cell link attributes and the dialog request fields they fill
+DETAIL_ATTRIBUTES = {
+    'sid': 'stuId',
+    'eid': 'entityId',
+    'cni': 'corNumId',
+    'trk': 'track',
+    'sec': 'section',
+    'gid': 'gbId',
+    'bkt': 'bucket',
+    'subjid': 'subjectId',
+}
+DETAIL_FORM = {
+    'action': 'viewGradeInfoDialog',
+    'gridCount': '1',
+    'fromHttp': 'yes',
+    'ishttp': 'true',
+    'dialogLevel': '1',
+    'isEoc': 'no',
+}
+# Cumulative columns repeat the assignments of the terms they cover
+AGGREGATE_PERIODS = {'SM1', 'SM2', 'YR'}
+
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Safari/537.36'
+)
+
+
+def new_session():
+    """Create a cookie-isolated session on top of the shared connection pool"""
+    session = requests.Session()
+    session.mount('https://', _adapter)
+    session.mount('http://', _adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+class HttpSkywardBackend:
+    """Log in and fetch the gradebook with plain form posts instead of a browser"""
+
+    def __init__(self, base_url=None, timeout=None):
+        self.base_url = base_url or SKYWARD_BASE_URL
+        self.timeout = timeout if timeout is not None else float(os.environ.get('SKYWARD_HTTP_TIMEOUT', 20))
+        # Assignments per class and period, filled by fetch(details=True)
+        self.details = {}
+
+    def login(self, session, username, password):
+        """Post credentials to skyporthttp.w and return the session tokens"""
+        url = f"{self.base_url}/skyporthttp.w"
+        # The longest mounted prefix wins, so only this endpoint skips the retrying adapter
+        session.mount(url, _login_adapter)
+        response = session.post(url, data={
+            'requestAction': 'eel',
+            'method': 'extrainfo',
+            'codeType': 'tryLogin',
+            'codeValue': username,
+            'login': username,
+            'password': password,
+            'cUserRole': 'family/student',
+        }, timeout=self.timeout)
+        response.raise_for_status()
+
+        match = re.search(r'<li>(.*?)</li>', response.text, re.S)
+        # Anything but the expected list (maintenance or error pages, a moved endpoint) lets auto mode fall back
+        if not match:
+            raise Exception("Login failed: unexpected login response")
+        if not match.group(1).strip():
+            raise Exception("Incorrect username or password. Please check your credentials and try again.")
+        fields = match.group(1).split('^')
+        if len(fields) < 15:
+            raise Exception(f"Login failed: unexpected login response ({len(fields)} fields)")
+
+        return {
+            'dwd': fields[0],
+            'wfaacl': fields[3],
+            'encses': fields[14],
+            'User-Type': fields[6],
+            'sessionid': f"{fields[1]}\x15{fields[2]}",
+        }
+
+    def fetch_gradebook(self, session, login_data):
+        """Fetch the raw gradebook page for an authenticated session"""
+        response = session.post(f"{self.base_url}/sfgradebook001.w", data=login_data, timeout=self.timeout)
+        response.raise_for_status()
+        if 'Your session has expired' in response.text:
+            raise Exception("Login failed: Skyward rejected the session")
+        return response.text
+
+    def fetch_details(self, session, login_data, targets, concurrency=None):
+        """Fetch assignment dialogs for (class name, period, params) targets a few at a time"""
+        concurrency = concurrency or int(os.environ.get('DETAIL_CONCURRENCY', 4))
+
+        def fetch_one(target):
+            class_name, period, params = target
+            response = session.post(f"{self.base_url}/sfgradebook001.w",
+                                    data={**DETAIL_FORM, **login_data, **params}, timeout=self.timeout)
+            response.raise_for_status()
+            return parse_assignments(response.text)
+
+        details = {}
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='detail') as executor:
+            futures = [executor.submit(fetch_one, target) for target in targets]
+            for (class_name, period, _), future in zip(targets, futures):
+                try:
+                    details.setdefault(class_name, {})[period] = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to fetch assignments for {class_name} {period}: {str(e)}")
+        return details
+
+    def fetch(self, username, password, known_periods, progress=None, saved=None, details=False):
+        """Return (period_labels, rows, session) where rows are (class name, cell texts) pairs"""
+        if saved and saved.get('backend') == 'http':
+            try:
+                if progress:
+                    progress("Resuming Skyward session...", 20)
+                return self._fetch_with_session(saved, known_periods, progress, details)
+            except Exception as e:
+                logger.info(f"Saved session rejected, logging in again: {str(e)}")
+
+        session = new_session()
+        if progress:
+            progress("Logging into Skyward...", 20)
+        login_data = self.login(session, username, password)
+        return self._fetch_gradebook_grid(session, login_data, known_periods, progress, details)
+
+    def _fetch_with_session(self, saved, known_periods, progress, details):
+        session = new_session()
+        for cookie in saved['cookies']:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        return self._fetch_gradebook_grid(session, saved['login_data'], known_periods, progress, details)
+
+    def _fetch_gradebook_grid(self, session, login_data, known_periods, progress, details=False):
+        if progress:
+            progress("Accessing gradebook...", 35)
+        html = self.fetch_gradebook(session, login_data)
+        if progress:
+            progress("Extracting grades...", 50)
+        period_labels, rows = parse_gradebook(html, known_periods)
+        if details:
+            if progress:
+                progress("Fetching assignments...", 55)
+            self.details = self.fetch_details(session, login_data, parse_detail_links(html, known_periods))
+        saved = {
+            'backend': 'http',
+            'login_data': login_data,
+            'cookies': [
+                {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+                 'path': cookie.path, 'expiry': cookie.expires}
+                for cookie in session.cookies
+            ],
+        }
+        return period_labels, rows, saved
+
+
+class _Node:
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or [])
+        self.parent = parent
+        self.children = []
+
+    def iter(self, tag=None):
+        for child in self.children:
+            if isinstance(child, _Node):
+                if tag is None or child.tag == tag:
+                    yield child
+                yield from child.iter(tag)
+
+    def child_elements(self, tag):
+        return [child for child in self.children if isinstance(child, _Node) and child.tag == tag]
+
+    def text(self):
+        parts = []
+        for child in self.children:
+            parts.append(child.text() if isinstance(child, _Node) else child)
+        return ' '.join(''.join(parts).split())
+
+
+class _TreeBuilder(HTMLParser):
+    VOID = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'}
+    # Tags closed implicitly by a sibling start tag, bounded by their table
+    IMPLIED = {'td': {'td', 'th', 'tr'}, 'th': {'td', 'th', 'tr'}, 'tr': {'tr'}}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node('#document')
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        while self.stack[-1].tag in self.IMPLIED and tag in self.IMPLIED[self.stack[-1].tag]:
+            self.stack.pop()
+        node = _Node(tag, attrs, self.stack[-1])
+        self.stack[-1].children.append(node)
+        if tag not in self.VOID:
+            self.stack.append(node)
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+            if self.stack[index].tag == 'table':
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def _body_rows(table):
+    rows = []
+    for section in table.child_elements('tbody') or [table]:
+        rows.extend(section.child_elements('tr'))
+    return rows
+
+
+def _locate_grid(html, known_periods):
+    """Find (period_labels, grade row nodes, class names) in a gradebook page"""
+    known_periods = set(known_periods)
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    tables = list(builder.root.iter('table'))
+
+    # Header row: the first table whose thead names known grading periods
+    header_index = None
+    period_labels = []
+    for index, table in enumerate(tables):
+        for thead in table.child_elements('thead'):
+            cells = [th for tr in thead.child_elements('tr') for th in tr.child_elements('th')]
+            labels = [th.text() or '-' for th in cells]
+            if known_periods.intersection(labels):
+                header_index = index
+                period_labels = labels
+                break
+        if header_index is not None:
+            break
+    if header_index is None:
+        raise Exception("Could not find grading periods in gradebook page")
+
+    # Grade matrix: the next table with rows as wide as the header
+    grade_rows = None
+    for table in tables[header_index + 1:]:
+        rows = _body_rows(table)
+        if rows and all(len(row.child_elements('td')) == len(period_labels) for row in rows):
+            grade_rows = rows
+            break
+    if grade_rows is None:
+        raise Exception("Could not find grade rows in gradebook page")
+
+    # Class names: one row per class, each holding a nested table with the name link
+    class_names = None
+    for table in tables:
+        rows = _body_rows(table)
+        if len(rows) != len(grade_rows) or not all(any(True for _ in row.iter('table')) for row in rows):
+            continue
+        names = []
+        for row in rows:
+            link = next((a for span in row.iter('span') for a in span.iter('a')), None)
+            names.append(link.text() if link is not None else '')
+        if all(names):
+            class_names = names
+            break
+    if class_names is None:
+        raise Exception("Could not find class names in gradebook page")
+
+    return period_labels, grade_rows, class_names
+
+
+def parse_gradebook(html, known_periods):
+    """Parse the gradebook grid into (period_labels, rows) like the Selenium extraction"""
+    period_labels, grade_rows, class_names = _locate_grid(html, known_periods)
+    return period_labels, [(class_name, [td.text() for td in row.child_elements('td')])
+                           for class_name, row in zip(class_names, grade_rows)]
+
+
+def detail_period(label):
+    """Whether a grid column has its own assignments worth fetching"""
+    return label not in AGGREGATE_PERIODS and 'C' not in label
+
+
+def parse_detail_links(html, known_periods):
+    """(class name, period, dialog params) for every graded cell that links to its assignments"""
+    period_labels, grade_rows, class_names = _locate_grid(html, known_periods)
+    targets = []
+    for class_name, row in zip(class_names, grade_rows):
+        for label, td in zip(period_labels, row.child_elements('td')):
+            text = td.text()
+            if not detail_period(label) or not text.replace('.', '').isnumeric():
+                continue
+            link = next((a for a in td.iter('a') if a.attrs.get('data-cni')), None)
+            if link is None:
+                continue
+            params = {field: link.attrs[f'data-{attribute}'] for attribute, field in DETAIL_ATTRIBUTES.items()
+                      if f'data-{attribute}' in link.attrs}
+            targets.append((class_name, label, params))
+    return targets
+
+
+def parse_assignments(text):
+    """Assignments from a grade detail dialog, keyed by its column headers"""
+    # The dialog arrives wrapped as <data><![CDATA[...]]></data>
+    match = re.search(r'<!\[CDATA\[(.*)\]\]>', text, re.S)
+    builder = _TreeBuilder()
+    builder.feed(match.group(1) if match else text)
+    builder.close()
+    columns = {'due': 'due', 'assignment': 'name', 'grade': 'grade', 'score': 'score', 'points': 'points'}
+    assignments = []
+    for table in builder.root.iter('table'):
+        headers = [th.text().lower() for thead in table.child_elements('thead')
+                   for tr in thead.child_elements('tr') for th in tr.child_elements('th')]
+        if not any(header.startswith('assignment') for header in headers):
+            continue
+        keys = [next((key for prefix, key in columns.items() if header.startswith(prefix)), None)
+                for header in headers]
+        for row in _body_rows(table):
+            cells = [td.text() for td in row.child_elements('td')]
+            assignment = {key: cell for key, cell in zip(keys, cells) if key}
+            if assignment.get('name'):
+                grade = assignment.get('grade', '')
+                assignment['grade'] = float(grade) if grade.replace('.', '').isnumeric() else None
+                assignments.append(assignment)
+    return assignments
@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+from utils.store import get_store
+from utils.admission import get_admission_controller
+import os
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the scrape queue cannot take another job"""
+
+    def __init__(self, message, retry_after=60):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobManager:
+    """Runs scrapes on a bounded executor and tracks their status in the shared store"""
+
+    def __init__(self, max_workers=None, max_pending=None, store=None, admission=None):
+        self.max_workers = max_workers or int(os.environ.get('SCRAPE_WORKERS', 2))
+        self.max_pending = max_pending if max_pending is not None else int(os.environ.get('SCRAPE_QUEUE_SIZE', 20))
+        self.store = store or get_store()
+        # Caps concurrent scrapes across all workers, not just this one
+        self.admission = admission or get_admission_controller()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scrape')
+        self._lock = threading.Lock()
+        # Wakes local waiters early; waiters on other workers poll the store
+        self._changed = threading.Condition(self._lock)
+        self._pending = 0
+
+    def submit(self, func):
+        """Queue func(progress_callback) and return its job id"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_pending:
+                raise JobQueueFull("The server is busy right now, please try again in a minute")
+            self._pending += 1
+        job_id = uuid.uuid4().hex
+        if not self.admission.enqueue(job_id):
+            with self._lock:
+                self._pending -= 1
+            raise JobQueueFull("The server is busy right now, please try again in a minute",
+                               retry_after=self.admission.retry_after())
+        self.store.create_job(job_id)
+        self._executor.submit(self._run, job_id, func)
+        return job_id
+
+    def get(self, job_id):
+        """Return the job from any worker, or None if it is unknown or expired"""
+        return self.store.get_job(job_id)
+
+    def position(self, job_id):
+        """Place of a queued job in the global line, 0 once it is running"""
+        return self.admission.position(job_id)
+
+    def wait(self, job_id, seen_seq, seen_status, timeout=15, poll_interval=0.25):
+        """Block until the job has progress after seen_seq or a new status, then return it"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] != seen_status or (job['progress'] and job['progress'][-1]['seq'] > seen_seq):
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(poll_interval, remaining))
+
+    def stats(self):
+        """Report local executor load"""
+        with self._lock:
+            pending = self._pending
+        return {
+            'pending': pending,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+        }
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def _run(self, job_id, func):
+        def progress_callback(message, progress):
+            self.store.append_progress(f"job:{job_id}", message, progress)
+            self._notify()
+
+        def on_wait(position):
+            progress_callback(f"Waiting for a free browser ({position} in line)...", 2)
+
+        try:
+            try:
+                self.admission.acquire(job_id, on_wait)
+                self.store.update_job(job_id, 'running')
+                self._notify()
+                result = func(progress_callback)
+                self.store.update_job(job_id, 'done', result=result)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                self.store.update_job(job_id, 'error', error=str(e))
+            self._notify()
+        finally:
+            self.admission.release(job_id)
+            with self._lock:
+                self._pending -= 1
@@ -0,0 +1,147 @@
+from collections import namedtuple
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from utils.store import get_store
+from utils.metrics import get_metrics
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# catch_all strategies match almost anything, so they are only tried after every specific one
+Strategy = namedtuple('Strategy', ['name', 'by', 'value', 'timeout', 'catch_all'], defaults=[False])
+
+# Ways to find each element, in their original order of preference
+LOCATORS = {
+    'login_link': [
+        Strategy('original_xpath', By.XPATH,
+                 '/html/body/form[1]/div/div/div[4]/div[2]/div[1]/div[2]/div/table/tbody/tr[7]/td/a', 10),
+        Strategy('text_search', By.XPATH,
+                 "//a[contains(text(), 'Login') or contains(text(), 'Sign In') or contains(text(), 'Enter')]", 5),
+        Strategy('form_link', By.XPATH, "//form//a", 5, catch_all=True),
+    ],
+    'gradebook_button': [
+        Strategy('updated_xpath', By.XPATH, '/html/body/div[1]/div[2]/div[2]/div[1]/div/ul[2]/li[2]/a', 5),
+        Strategy('text_search', By.XPATH, "//a[contains(text(), 'Gradebook')]", 5),
+    ],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locator_strategies (
+    step TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    successes INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_success REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (step, strategy)
+);
+CREATE TABLE IF NOT EXISTS locator_steps (
+    step TEXT PRIMARY KEY,
+    lookups INTEGER NOT NULL DEFAULT 0,
+    fallbacks INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class LocatorRegistry:
+    """Tries whichever strategy last worked for a step first, shared across workers and restarts"""
+
+    def __init__(self, store=None, locators=None):
+        self.store = store or get_store()
+        self.locators = locators or LOCATORS
+        self.store.connect().executescript(SCHEMA)
+
+    def ordered(self, step):
+        """Strategies for a step, most recently successful first, with catch-all strategies last"""
+        rows = self.store.connect().execute(
+            'SELECT strategy, last_success FROM locator_strategies WHERE step = ?', (step,)
+        ).fetchall()
+        last_success = {row['strategy']: row['last_success'] for row in rows}
+        strategies = self.locators[step]
+        # sorted() is stable, so never-successful strategies keep their original order
+        return sorted(strategies, key=lambda strategy: (strategy.catch_all, -last_success.get(strategy.name, 0)))
+
+    def find(self, driver, step, condition=EC.element_to_be_clickable, on_fallback=None, confirm=None):
+        """Return the element for step, trying strategies in ranked order
+
+        confirm(element), if given, acts on the first element found and raises
+        unless the step worked; the strategy only counts as successful once it
+        passes. confirm runs once: later strategies are never tried after it
+        has acted on the page, and its error is raised as is.
+        """
+        for index, strategy in enumerate(self.ordered(step)):
+            try:
+                element = WebDriverWait(driver, strategy.timeout).until(condition((strategy.by, strategy.value)))
+            except Exception:
+                logger.info(f"{step}: strategy '{strategy.name}' failed")
+                self._record(step, strategy.name, success=False)
+                if index == 0 and on_fallback:
+                    on_fallback()
+                continue
+            if confirm:
+                try:
+                    confirm(element)
+                except Exception:
+                    logger.info(f"{step}: strategy '{strategy.name}' found an element but the step did not complete")
+                    self._record(step, strategy.name, success=False)
+                    raise
+            logger.info(f"{step}: found with strategy '{strategy.name}'")
+            self._record(step, strategy.name, success=True, fallback=index > 0)
+            if index > 0:
+                get_metrics().increment('skyward_fallbacks_total', path=f'locator:{step}')
+            return element
+        self._record_lookup(step, fallback=True)
+        raise Exception(f"No locator strategy matched for {step}")
+
+    def stats(self):
+        """Per-step fallback rate and per-strategy hit counts"""
+        conn = self.store.connect()
+        report = {}
+        for row in conn.execute('SELECT step, lookups, fallbacks FROM locator_steps').fetchall():
+            report[row['step']] = {
+                'lookups': row['lookups'],
+                'fallbacks': row['fallbacks'],
+                'fallback_rate': row['fallbacks'] / row['lookups'] if row['lookups'] else 0.0,
+                'order': [strategy.name for strategy in self.ordered(row['step'])],
+                'strategies': {},
+            }
+        for row in conn.execute('SELECT step, strategy, successes, failures FROM locator_strategies').fetchall():
+            if row['step'] in report:
+                report[row['step']]['strategies'][row['strategy']] = {
+                    'successes': row['successes'],
+                    'failures': row['failures'],
+                }
+        return report
+
+    def _record(self, step, strategy, success, fallback=False):
+        conn = self.store.connect()
+        conn.execute(
+            'INSERT INTO locator_strategies (step, strategy, successes, failures, last_success) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (step, strategy) DO UPDATE SET successes = successes + excluded.successes, '
+            'failures = failures + excluded.failures, last_success = MAX(last_success, excluded.last_success)',
+            (step, strategy, int(success), int(not success), time.time() if success else 0)
+        )
+        if success:
+            self._record_lookup(step, fallback)
+
+    def _record_lookup(self, step, fallback):
+        self.store.connect().execute(
+            'INSERT INTO locator_steps (step, lookups, fallbacks) VALUES (?, 1, ?) '
+            'ON CONFLICT (step) DO UPDATE SET lookups = lookups + 1, fallbacks = fallbacks + excluded.fallbacks',
+            (step, int(fallback))
+        )
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_locator_registry():
+    """Return the per-process locator registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LocatorRegistry()
+        return _registry
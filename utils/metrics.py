@@ -0,0 +1,175 @@
+from contextlib import contextmanager
+from utils.store import get_store, _pid_alive
+import math
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+STAGE_METRIC = 'skyward_stage_seconds'
+# Upper bounds in seconds; a Skyward login alone usually takes several seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, math.inf)
+
+HELP = {
+    STAGE_METRIC: ('histogram', 'Time spent in each scraping stage'),
+    'skyward_failures_total': ('counter', 'Failed scrapes by failure type'),
+    'skyward_fallbacks_total': ('counter', 'Times a slower fallback path was taken'),
+    'skyward_browsers': ('gauge', 'Pooled browsers across all workers'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_counters (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, labels)
+);
+CREATE TABLE IF NOT EXISTS metric_buckets (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    le REAL NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, labels, le)
+);
+CREATE TABLE IF NOT EXISTS metric_gauges (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels, pid)
+);
+"""
+
+COUNTER_UPSERT = ('INSERT INTO metric_counters (name, labels, value) VALUES (?, ?, ?) '
+                  'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+
+
+def _format_le(le):
+    return '+Inf' if le == math.inf else f'{le:g}'
+
+
+def _series(name, labels, extra=''):
+    labels = ','.join(part for part in (labels, extra) if part)
+    return f'{name}{{{labels}}}' if labels else name
+
+
+class Metrics:
+    """Counters, gauges and histograms kept in the shared store so /metrics covers every worker"""
+
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        self.store.connect().executescript(SCHEMA)
+
+    def increment(self, name, value=1, **labels):
+        """Add to a counter"""
+        try:
+            self.store.connect().execute(COUNTER_UPSERT, (name, _labels(labels), value))
+        except Exception as e:
+            logger.warning(f"Failed to record metric {name}: {str(e)}")
+
+    def observe(self, name, value, **labels):
+        """Record one histogram sample"""
+        key = _labels(labels)
+        le = next(bound for bound in BUCKETS if value <= bound)
+        try:
+            conn = self.store.connect()
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT INTO metric_buckets (name, labels, le, count) VALUES (?, ?, ?, 1) '
+                    'ON CONFLICT (name, labels, le) DO UPDATE SET count = count + 1',
+                    (name, key, le)
+                )
+                conn.execute(COUNTER_UPSERT, (f'{name}_sum', key, value))
+                conn.execute(COUNTER_UPSERT, (f'{name}_count', key, 1))
+        except Exception as e:
+            logger.warning(f"Failed to record metric {name}: {str(e)}")
+
+    def set_gauge(self, name, value, **labels):
+        """Set this worker's value for a gauge; /metrics reports the sum over live workers"""
+        try:
+            self.store.connect().execute(
+                'INSERT INTO metric_gauges (name, labels, pid, value) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (name, labels, pid) DO UPDATE SET value = excluded.value',
+                (name, _labels(labels), os.getpid(), value)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record metric {name}: {str(e)}")
+
+    @contextmanager
+    def timer(self, stage):
+        """Time a block as a stage, labelled by whether it raised"""
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            self.observe(STAGE_METRIC, time.monotonic() - started, stage=stage, outcome=outcome)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        conn = self.store.connect()
+        lines = []
+        families = {}
+
+        buckets = {}
+        for row in conn.execute('SELECT name, labels, le, count FROM metric_buckets').fetchall():
+            buckets.setdefault((row['name'], row['labels']), {})[row['le']] = row['count']
+        counters = {(row['name'], row['labels']): row['value']
+                    for row in conn.execute('SELECT name, labels, value FROM metric_counters').fetchall()}
+
+        for (name, labels), counts in sorted(buckets.items()):
+            family = families.setdefault(name, [])
+            cumulative = 0
+            for le in BUCKETS:
+                cumulative += counts.get(le, 0)
+                bucket = _series(name + '_bucket', labels, _labels({'le': _format_le(le)}))
+                family.append(f'{bucket} {cumulative}')
+            family.append(f'{_series(name + "_sum", labels)} {counters.pop((name + "_sum", labels), 0):g}')
+            family.append(f'{_series(name + "_count", labels)} {counters.pop((name + "_count", labels), 0):g}')
+
+        for (name, labels), value in sorted(counters.items()):
+            families.setdefault(name, []).append(f'{_series(name, labels)} {value:g}')
+
+        gauges = {}
+        dead = set()
+        for row in conn.execute('SELECT name, labels, pid, value FROM metric_gauges').fetchall():
+            if not _pid_alive(row['pid']):
+                dead.add(row['pid'])
+                continue
+            gauges[(row['name'], row['labels'])] = gauges.get((row['name'], row['labels']), 0) + row['value']
+        for pid in dead:
+            conn.execute('DELETE FROM metric_gauges WHERE pid = ?', (pid,))
+        for (name, labels), value in sorted(gauges.items()):
+            families.setdefault(name, []).append(f'{_series(name, labels)} {value:g}')
+
+        for name, family in sorted(families.items()):
+            kind, description = HELP.get(name, ('untyped', name))
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(family)
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the per-process metrics recorder"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
@@ -0,0 +1,81 @@
+from utils.gpa_engine import course_weights
+import gzip
+import hashlib
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this gain little from gzip and cost a round of CPU
+MIN_GZIP_BYTES = int(os.environ.get('MIN_GZIP_BYTES', 1024))
+
+
+def compact(result):
+    """Columnar form of a calculate() result: names appear once and grades and GPAs are arrays
+
+    grades[row][col] is the grade of classes[row] in periods[col], or None.
+    GPA arrays follow periods. grades_raw is left out since the page only
+    shows filtered grades.
+    """
+    periods = result['ordered_periods']
+    classes = list(result['grades'])
+    # Results stored before weights were sent get them from the current rules
+    weights = result.get('course_weights') or course_weights(classes)
+    payload = {
+        'version': result.get('version'),
+        'classes': classes,
+        'periods': periods,
+        'grades': [[result['grades'][class_name].get(period) for period in periods] for class_name in classes],
+        'course_weights': [weights.get(class_name) for class_name in classes],
+        'unweighted_gpas': [result['unweighted_gpas'].get(period) for period in periods],
+        'weighted_gpas': [result['weighted_gpas'].get(period) for period in periods],
+    }
+    if 'assignments' in result:
+        payload['assignments'] = result['assignments']
+    return payload
+
+
+def etag(body, encoding=None):
+    """Strong ETag for a serialized body; each content encoding gets its own tag"""
+    tag = hashlib.sha1(body).hexdigest()[:16]
+    return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+
+def accepts_encoding(accept_encoding, encoding):
+    """True unless Accept-Encoding leaves out the encoding or gives it q=0"""
+    accepted = {}
+    for token in accept_encoding.split(','):
+        name, _, params = token.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted.get(encoding, accepted.get('*', 0.0)) > 0
+
+
+def encode(data, accept_encoding='', if_none_match=''):
+    """Serialize data for an HTTP response: (status, headers, body), honouring If-None-Match and gzip"""
+    body = json.dumps(data, separators=(',', ':')).encode()
+    encoding = 'gzip' if len(body) >= MIN_GZIP_BYTES and accepts_encoding(accept_encoding, 'gzip') else None
+    tag = etag(body, encoding)
+    headers = {
+        'ETag': tag,
+        # Browsers may keep the body but must check it is current before reuse
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    # If-None-Match uses weak comparison, and proxies may weaken our tags
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    if tag in [candidate[2:] if candidate.startswith('W/') else candidate for candidate in candidates]:
+        return 304, headers, b''
+    headers['Content-Type'] = 'application/json'
+    if encoding:
+        body = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = encoding
+    return 200, headers, body
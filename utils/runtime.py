@@ -0,0 +1,285 @@
+import fcntl
+import os
+import platform
+import signal
+import subprocess
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHROMEDRIVER_PATH = "/usr/local/bin/chromedriver"
+CHROME_PATH = '/usr/bin/google-chrome'
+# Passed to every Chrome we launch so orphans can be recognised as ours
+MANAGED_FLAG = '--skyward-managed'
+
+
+def headless():
+    return os.environ.get('HEADLESS', 'true').lower() == 'true'
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _proc_stat(pid):
+    """Return (ppid, state) for a pid, or None if it is gone"""
+    data = _read(f'/proc/{pid}/stat')
+    if data is None:
+        return None
+    # The command name may contain spaces and parentheses; fields resume after the last ')'
+    fields = data.rsplit(b')', 1)[1].split()
+    return int(fields[1]), fields[0].decode()
+
+
+def _rss_kb(pid):
+    data = _read(f'/proc/{pid}/status')
+    if data is None:
+        return 0
+    for line in data.decode(errors='replace').splitlines():
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1])
+    return 0
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, or None where it cannot be read"""
+    data = _read('/proc/meminfo')
+    if data is None:
+        return None
+    for line in data.decode(errors='replace').splitlines():
+        if line.startswith('MemAvailable:'):
+            return int(line.split()[1]) / 1024
+    return None
+
+
+def _all_pids():
+    return [int(name) for name in os.listdir('/proc') if name.isdigit()]
+
+
+def _children_map():
+    children = {}
+    for pid in _all_pids():
+        stat = _proc_stat(pid)
+        if stat:
+            children.setdefault(stat[0], []).append(pid)
+    return children
+
+
+def _descendants(pid, children):
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def _kill(pids):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+class BrowserSupervisor:
+    """Owns the display server and every browser process this worker spawns"""
+
+    def __init__(self, memory_cap_mb=None, interval=None):
+        self.memory_cap_mb = memory_cap_mb if memory_cap_mb is not None else int(
+            os.environ.get('BROWSER_MEMORY_CAP_MB', 1024))
+        self.interval = interval if interval is not None else int(os.environ.get('SUPERVISOR_INTERVAL', 30))
+        self.enabled = platform.system() == 'Linux' and os.path.isdir('/proc')
+        self._lock = threading.Lock()
+        self._tracked = {}
+        self._on_kill = {}
+        # Pids we killed or stopped tracking; only these are ours to reap
+        self._reapable = set()
+        self._watchdog = None
+        self._counters = {'reaped': 0, 'orphans_killed': 0, 'memory_kills': 0}
+
+    def ensure_display(self):
+        """Reuse the X display if it is up, otherwise start one Xvfb shared by all workers"""
+        if headless() or not self.enabled:
+            return
+        display = os.environ.get('DISPLAY') or ':99'
+        number = display.lstrip(':').split('.')[0]
+        socket_path = f'/tmp/.X11-unix/X{number}'
+        os.environ['DISPLAY'] = display
+        if os.path.exists(socket_path):
+            return
+
+        # Only one worker may start the server
+        with open(f'/tmp/.skyward-xvfb-{number}.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(socket_path):
+                return
+            logger.info(f"Starting Xvfb on {display}")
+            subprocess.Popen(
+                ['Xvfb', display, '-screen', '0', '1920x1080x24'],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+            )
+            deadline = time.monotonic() + 5
+            while not os.path.exists(socket_path) and time.monotonic() < deadline:
+                time.sleep(0.1)
+            if not os.path.exists(socket_path):
+                raise Exception(f"Xvfb did not start on {display}")
+
+    def track(self, driver, on_kill=None):
+        """Start watching a driver's chromedriver and browser processes; on_kill() runs if we kill them"""
+        if not self.enabled:
+            return
+        try:
+            pid = driver.service.process.pid
+        except AttributeError:
+            return
+        with self._lock:
+            self._tracked[id(driver)] = pid
+            if on_kill is not None:
+                self._on_kill[id(driver)] = on_kill
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name='browser-supervisor', daemon=True)
+                self._watchdog.start()
+
+    def untrack(self, driver):
+        """Stop watching a driver and kill anything it left behind after quit()"""
+        with self._lock:
+            pid = self._tracked.pop(id(driver), None)
+            self._on_kill.pop(id(driver), None)
+        if pid is None:
+            return []
+        return [pid] + _descendants(pid, _children_map())
+
+    def kill_leftovers(self, pids):
+        """SIGKILL processes from a quit driver that are still running, then reap"""
+        alive = [pid for pid in pids if (_proc_stat(pid) or (0, 'X'))[1] not in ('X', 'Z')]
+        if alive:
+            logger.warning(f"Killing {len(alive)} browser processes left after quit")
+            _kill(alive)
+        with self._lock:
+            self._reapable.update(pids)
+        self.reap()
+
+    def reap(self):
+        """Collect browser processes we killed so they do not linger as zombies
+
+        Other children (Xvfb, chromedriver services still in use) belong to
+        their Popen objects, which need their exit status.
+        """
+        with self._lock:
+            pids = list(self._reapable)
+        reaped = 0
+        done = []
+        for pid in pids:
+            try:
+                exited, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                # Not our child, or its owner already collected it
+                done.append(pid)
+                continue
+            if exited:
+                done.append(pid)
+                reaped += 1
+        with self._lock:
+            self._reapable.difference_update(done)
+            self._counters['reaped'] += reaped
+        return reaped
+
+    def kill_orphans(self):
+        """Kill browsers we launched whose owning worker or driver is gone"""
+        live_roots = set()
+        children = _children_map()
+        with self._lock:
+            tracked = list(self._tracked.values())
+        for pid in tracked:
+            live_roots.add(pid)
+            live_roots.update(_descendants(pid, children))
+
+        orphans = []
+        uid = os.getuid()
+        for pid in _all_pids():
+            if pid in live_roots or pid == os.getpid():
+                continue
+            stat = _proc_stat(pid)
+            if stat is None or stat[0] != 1:
+                continue
+            try:
+                if os.stat(f'/proc/{pid}').st_uid != uid:
+                    continue
+            except OSError:
+                continue
+            cmdline = (_read(f'/proc/{pid}/cmdline') or b'').split(b'\0')
+            if MANAGED_FLAG.encode() in cmdline or (cmdline and cmdline[0] == CHROMEDRIVER_PATH.encode()):
+                orphans.append(pid)
+                orphans.extend(_descendants(pid, children))
+        if orphans:
+            logger.warning(f"Killing {len(orphans)} orphaned browser processes")
+            _kill(orphans)
+            with self._lock:
+                self._counters['orphans_killed'] += len(orphans)
+        return len(orphans)
+
+    def enforce_memory_caps(self):
+        """Kill any browser whose process tree exceeds the memory cap"""
+        if not self.memory_cap_mb:
+            return
+        children = _children_map()
+        with self._lock:
+            tracked = list(self._tracked.items())
+        for key, pid in tracked:
+            tree = [pid] + _descendants(pid, children)
+            rss_mb = sum(_rss_kb(member) for member in tree) / 1024
+            if rss_mb > self.memory_cap_mb:
+                logger.error(f"Browser {pid} uses {rss_mb:.0f}MB (cap {self.memory_cap_mb}MB), killing it")
+                _kill(tree)
+                with self._lock:
+                    self._reapable.update(tree)
+                    self._counters['memory_kills'] += 1
+                    on_kill = self._on_kill.get(key)
+                # Let the owner forget the driver, or it would hand out a dead browser
+                if on_kill is not None:
+                    on_kill()
+
+    def stats(self):
+        """Tracked browsers, their memory use and cleanup counters"""
+        with self._lock:
+            stats = dict(self._counters)
+            tracked = list(self._tracked.values())
+        stats['tracked'] = len(tracked)
+        stats['memory_cap_mb'] = self.memory_cap_mb
+        if self.enabled:
+            children = _children_map()
+            stats['rss_mb'] = round(sum(
+                _rss_kb(member) for pid in tracked for member in [pid] + _descendants(pid, children)
+            ) / 1024, 1)
+        return stats
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.enforce_memory_caps()
+                self.kill_orphans()
+                self.reap()
+            except Exception as e:
+                logger.error(f"Browser supervisor pass failed: {str(e)}")
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    """Return the per-process browser supervisor"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = BrowserSupervisor()
+        return _supervisor
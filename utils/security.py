@@ -0,0 +1,92 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_secret = None
+_secret_lock = threading.Lock()
+
+VERIFIER_ITERATIONS = 100_000
+
+
+def server_secret():
+    """Secret shared by all workers: SECRET_KEY, or a random key persisted next to the store"""
+    global _secret
+    with _secret_lock:
+        if _secret is not None:
+            return _secret
+        if os.environ.get('SECRET_KEY'):
+            _secret = os.environ['SECRET_KEY'].encode()
+            return _secret
+
+        path = os.environ.get('SECRET_PATH') or os.environ.get('STORE_PATH', '/tmp/skyward_store.sqlite3') + '.secret'
+        if not os.path.exists(path):
+            # Write the key in full before linking it into place, so a concurrent
+            # worker never reads a half-written file; the first link wins
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.secret-')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(secrets.token_hex(32))
+                os.link(tmp_path, path)
+                logger.info(f"Generated server secret at {path}")
+            except FileExistsError:
+                pass
+            finally:
+                os.unlink(tmp_path)
+        with open(path) as f:
+            _secret = f.read().strip().encode()
+        return _secret
+
+
+def user_key(username):
+    """Salted, non-reversible key for a username"""
+    return hmac.new(server_secret(), username.strip().lower().encode(), hashlib.sha256).hexdigest()
+
+
+def make_verifier(password, salt=None):
+    """Slow salted hash proving knowledge of a password without storing it"""
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), VERIFIER_ITERATIONS).hex()
+    return f"{salt}${digest}"
+
+
+def check_verifier(password, verifier):
+    """Return True if the password matches a verifier from make_verifier()"""
+    if not verifier or '$' not in verifier:
+        return False
+    salt, _ = verifier.split('$', 1)
+    return hmac.compare_digest(make_verifier(password, salt), verifier)
+
+
+def sign_token(payload, ttl):
+    """Tamper-proof, expiring token carrying a small JSON payload"""
+    body = base64.urlsafe_b64encode(json.dumps(dict(payload, exp=int(time.time() + ttl))).encode()).decode()
+    signature = hmac.new(server_secret(), body.encode(), hashlib.sha256).hexdigest()
+    return f"{body}.{signature}"
+
+
+def read_token(token):
+    """Return the payload of a token from sign_token(), or None if it is forged or expired"""
+    # Tokens arrive from JSON bodies and query strings, so anything may turn up here
+    if not isinstance(token, str) or '.' not in token:
+        return None
+    body, signature = token.rsplit('.', 1)
+    expected = hmac.new(server_secret(), body.encode(), hashlib.sha256).hexdigest()
+    # compare_digest only accepts ASCII str, so compare bytes
+    if not hmac.compare_digest(signature.encode(), expected.encode()):
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(body.encode()))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or payload.get('exp', 0) < time.time():
+        return None
+    return payload
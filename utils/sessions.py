@@ -0,0 +1,96 @@
+from utils.security import server_secret, user_key
+from utils.store import get_store
+import base64
+import hashlib
+import json
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # Session reuse is an optimization; run without it
+    Fernet = None
+    InvalidToken = Exception
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS skyward_sessions (
+    user_key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS skyward_sessions_expires ON skyward_sessions (expires_at);
+"""
+
+KEY_ITERATIONS = 100_000
+
+
+class SessionStore:
+    """Authenticated Skyward cookies, encrypted with a key only the user's password unlocks"""
+
+    def __init__(self, store=None, ttl=None):
+        self.store = store or get_store()
+        self.ttl = ttl if ttl is not None else int(os.environ.get('SESSION_REUSE_TTL', 900))
+        if Fernet is None:
+            logger.warning("cryptography is not installed - Skyward session reuse is disabled")
+        self.store.connect().executescript(SCHEMA)
+
+    @property
+    def enabled(self):
+        return Fernet is not None and self.ttl > 0
+
+    def _fernet(self, username, password):
+        salt = server_secret() + user_key(username).encode()
+        key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, KEY_ITERATIONS)
+        return Fernet(base64.urlsafe_b64encode(key))
+
+    def load(self, username, password):
+        """Return the saved session for this user, or None if missing, expired or undecryptable"""
+        if not self.enabled:
+            return None
+        row = self.store.connect().execute(
+            'SELECT payload, expires_at FROM skyward_sessions WHERE user_key = ?', (user_key(username),)
+        ).fetchone()
+        if row is None:
+            return None
+        if row['expires_at'] < time.time():
+            self.forget(username)
+            return None
+        try:
+            return json.loads(self._fernet(username, password).decrypt(row['payload']))
+        except InvalidToken:
+            # Password changed since the session was saved
+            return None
+
+    def save(self, username, password, session, cookie_expiries=()):
+        """Encrypt and store a session, expiring with its earliest cookie or after ttl"""
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = min([now + self.ttl] + [expiry for expiry in cookie_expiries if expiry])
+        if expires_at <= now:
+            return
+        payload = self._fernet(username, password).encrypt(json.dumps(session).encode())
+        conn = self.store.connect()
+        conn.execute(
+            'INSERT INTO skyward_sessions (user_key, payload, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (user_key) DO UPDATE SET payload = excluded.payload, expires_at = excluded.expires_at',
+            (user_key(username), payload, expires_at)
+        )
+        conn.execute('DELETE FROM skyward_sessions WHERE expires_at < ?', (now,))
+
+    def forget(self, username):
+        self.store.connect().execute('DELETE FROM skyward_sessions WHERE user_key = ?', (user_key(username),))
+
+
+_session_store = None
+
+
+def get_session_store():
+    """Return the per-process session store"""
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore()
+    return _session_store
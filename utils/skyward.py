@@ -1,38 +1,155 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.action_chains import ActionChains
-import platform
+from utils.driver_pool import get_driver_pool, apply_lean_profile
+from utils.http_backend import (HttpSkywardBackend, SKYWARD_BASE_URL, DETAIL_ATTRIBUTES, DETAIL_FORM,
+                                detail_period, parse_assignments)
+from utils.sessions import get_session_store
+from utils.delta import affected_periods
+from utils.gpa_engine import compute_gpas, course_weights, PERIOD_ORDER
+from utils.locators import get_locator_registry
+from utils.security import user_key
+from utils.tracing import StepTrace
+from utils.metrics import get_metrics
+from selenium.common.exceptions import TimeoutException
 import os
-import subprocess
 import traceback
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Gradebook grid locations
+GRADING_PERIODS_XPATH = '/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[1]/div/div[1]/div[1]/table/thead/tr/th'
+GRADE_ROWS_XPATH = '/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[1]/div/div[1]/div[2]/table/tbody'
+CLASSES_CONTAINER_XPATH = '/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[2]/div[2]/table/tbody'
+CLASS_NAME_RELATIVE_XPATH = 'td/div/table/tbody/tr[1]/td[2]/span/a'
+SIDEBAR_XPATH = '/html/body/div[1]/div[2]/div[2]/div[1]/div/ul[1]/li/a'
+NAV_MENU_XPATH = '/html/body/div[1]/div[2]/div[2]/div[1]/div/ul'
+
+# Reads the whole grid in one WebDriver round-trip
+BULK_EXTRACT_SCRIPT = """
+const snapshot = (path, context) => document.evaluate(
+    path, context || document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const first = (path, context) => document.evaluate(
+    path, context || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const texts = (result) => {
+    const values = [];
+    for (let i = 0; i < result.snapshotLength; i++) {
+        values.push(result.snapshotItem(i).innerText);
+    }
+    return values;
+};
+
+const labels = texts(snapshot(arguments[0]));
+const classRows = snapshot(arguments[1] + '/tr');
+const rows = [];
+for (let i = 1; i <= classRows.snapshotLength; i++) {
+    const link = first(arguments[1] + '/tr[' + i + ']/' + arguments[3]);
+    rows.push({
+        name: link ? link.innerText.trim() : null,
+        cells: texts(snapshot(arguments[2] + '/tr[' + i + ']/td'))
+    });
+}
+return {labels: labels, rows: rows};
+"""
+
+def failure_type(error):
+    """Coarse failure category for metrics"""
+    message = str(error)
+    if "Incorrect username or password" in message:
+        return 'bad_credentials'
+    if isinstance(error, TimeoutException) or "Timed out" in message:
+        return 'timeout'
+    # login() shows users its own message for a missing login link
+    if "No locator strategy matched" in message or "Could not find login link" in message:
+        return 'locator'
+    if "Failed to initialize Chrome driver" in message:
+        return 'driver'
+    return type(error).__name__
+
+# Opens assignment dialogs for many grade cells at once from the logged-in page.
+# The callback is the last argument, as execute_async_script appends it.
+DETAIL_FETCH_SCRIPT = """
+const [rowsPath, classesPath, namePath, columns, attributes, form, sessionFields, concurrency] = arguments;
+const done = arguments[arguments.length - 1];
+const snapshot = (path) => document.evaluate(
+    path, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const first = (path) => document.evaluate(
+    path, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+
+// Session tokens Skyward expects with every dialog request
+const tokens = {};
+sessionFields.forEach((name) => {
+    const input = document.getElementsByName(name)[0] || document.getElementById(name);
+    if (input && input.value) tokens[name] = input.value;
+});
+
+const targets = [];
+const classRows = snapshot(classesPath + '/tr');
+for (let i = 1; i <= classRows.snapshotLength; i++) {
+    const link = first(classesPath + '/tr[' + i + ']/' + namePath);
+    if (!link) continue;
+    const cells = snapshot(rowsPath + '/tr[' + i + ']/td');
+    columns.forEach((column) => {
+        const cell = cells.snapshotItem(column);
+        const anchor = cell && cell.querySelector('a[data-cni]');
+        if (!anchor || !/^[0-9.]+$/.test(cell.innerText.trim())) return;
+        const params = new URLSearchParams(Object.assign({}, form, tokens));
+        Object.entries(attributes).forEach(([key, field]) => {
+            if (anchor.dataset[key] !== undefined) params.set(field, anchor.dataset[key]);
+        });
+        targets.push({name: link.innerText.trim(), column: column, params: params});
+    });
+}
+
+const results = [];
+let next = 0;
+const worker = async () => {
+    while (next < targets.length) {
+        const target = targets[next++];
+        try {
+            const response = await fetch('sfgradebook001.w', {
+                method: 'POST', body: target.params, credentials: 'same-origin'});
+            results.push({name: target.name, column: target.column, html: await response.text()});
+        } catch (error) {
+            results.push({name: target.name, column: target.column, error: String(error)});
+        }
+    }
+};
+Promise.all(Array.from({length: Math.min(concurrency, targets.length)}, worker)).then(() => done(results));
+"""
+DETAIL_SESSION_FIELDS = ['dwd', 'wfaacl', 'encses', 'User-Type', 'sessionid']
+
+
 class SkywardGPA:
-    def __init__(self, username, password, progress_callback=None):
+    def __init__(self, username, password, progress_callback=None, driver_pool=None, backend=None, session_store=None,
+                 trace=None, detail=False):
         self.username = username
         self.password = password
         self.progress_callback = progress_callback
+        self.driver_pool = driver_pool or get_driver_pool()
+        self.session_store = session_store or get_session_store()
+        self.locators = get_locator_registry()
+        self.metrics = get_metrics()
+        # Step captures stay in memory unless the scrape fails or is sampled
+        self.trace = trace or StepTrace(metadata={'user': user_key(username)[:16]})
+        self.home_url = None
+        # 'selenium', 'http', or 'auto' (HTTP first, Selenium on failure)
+        self.backend = (backend or os.environ.get('SCRAPER_BACKEND', 'auto')).lower()
         self.driver = None
+        # Also fetch per-assignment grades for every graded class and period
+        self.detail = detail
+        self.assignments = {}
+        self.period_labels = []
         self.grades_raw = {}
         self.grades = {}
         self.period_gpas = {}
         self.weighted_period_gpas = {}
         # Define the correct order of periods
-        self.period_order = ['1U1', '1U2', 'NW1', '2U1', '2U2', 'NW2', 'EX1', 'SM1', 
-                            '3U1', '3U2', 'NW3', '4U1', '4U2', 'NW4', 'EX2', 'SM2', 'YR']
+        self.period_order = list(PERIOD_ORDER)
         self.ordered_periods = []
-        
-        # Only start Xvfb on Linux (Render)
-        if platform.system() == 'Linux' and not os.environ.get('DISPLAY'):
-            subprocess.Popen(['Xvfb', ':99', '-screen', '0', '1024x768x24'])
-            os.environ['DISPLAY'] = ':99'
     
     def send_progress_update(self, message, progress):
         """Send progress update to frontend"""
@@ -41,98 +158,199 @@ class SkywardGPA:
             self.progress_callback(message, progress)
     
     def take_debug_screenshot(self, step_name):
-        """Take a screenshot for debugging purposes"""
-        try:
-            screenshot_path = f"/tmp/debug_{step_name}.png"
-            self.driver.save_screenshot(screenshot_path)
-            logger.info(f"Debug screenshot saved: {screenshot_path}")
-        except Exception as e:
-            logger.error(f"Failed to take screenshot: {e}")
+        """Record a debugging step in the request trace"""
+        self.trace.capture(self.driver, step_name)
 
-    def calculate(self):
+    def calculate(self, previous=None):
+        """Scrape and compute GPAs; with a previous result, only changed periods are recomputed"""
         try:
-            logger.info("Initializing Chrome driver...")
             # Send initial progress update
             self.send_progress_update("Connecting to Skyward...", 5)
             
-            try:
-                # Set up Chrome options
-                options = webdriver.ChromeOptions()
-                options.add_argument('--no-sandbox')
-                options.add_argument('--disable-dev-shm-usage')
-                options.add_argument('--disable-gpu')
-                options.add_argument('--disable-extensions')
-                options.add_argument('--disable-infobars')
-                options.add_argument('--disable-notifications')
-                options.add_argument('--disable-popup-blocking')
-                options.add_argument('--ignore-certificate-errors')
-                options.add_argument('--window-size=1920,1080')
-                
-                # Only run headless on production (Render) or when explicitly set
-                # Set HEADLESS=false to debug visually
-                if os.environ.get('HEADLESS', 'true').lower() == 'true':
-                    options.add_argument('--headless=new')
-                else:
-                    logger.info("Running in NON-HEADLESS mode for debugging")
-                
-                # Use system chromedriver (installed by Dockerfile)
-                system_chromedriver = "/usr/local/bin/chromedriver"
-                logger.info(f"Using system chromedriver at: {system_chromedriver}")
-                service = ChromeService(system_chromedriver)
-                # Set Chrome binary location
-                options.binary_location = '/usr/bin/google-chrome'
-                
-                self.driver = webdriver.Chrome(service=service, options=options)
-            except Exception as e:
-                logger.error(f"Failed to initialize Chrome driver: {str(e)}")
-                logger.error(f"Chrome driver traceback: {traceback.format_exc()}")
-                raise Exception(
-                    f"Failed to initialize Chrome driver: {str(e)}"
-                )
-            logger.info("Chrome driver initialized successfully")
-            
-            # Send progress update before login
-            self.send_progress_update("Logging into Skyward...", 20)
-            self.login()
-            
-            # Send progress update before gradebook navigation
-            self.send_progress_update("Accessing gradebook...", 35)
-            self.navigate_to_gradebook()
-            
-            # Send progress update before grade extraction
-            self.send_progress_update("Extracting grades...", 50)
-            self.extract_grades()
+            if self.backend in ('http', 'auto'):
+                try:
+                    self.fetch_with_http()
+                except Exception as e:
+                    # Never retry bad credentials - a second attempt only risks a lockout
+                    if self.backend == 'http' or "Incorrect username or password" in str(e):
+                        raise
+                    logger.warning(f"HTTP backend failed, falling back to Selenium: {str(e)}")
+                    self.metrics.increment('skyward_fallbacks_total', path='http_to_selenium')
+                    self.grades_raw = {}
+                    self.grades = {}
+                    self.assignments = {}
+                    self.fetch_with_selenium()
+            else:
+                self.fetch_with_selenium()
             
             # Send progress update before GPA calculation
             self.send_progress_update("Analyzing class data...", 65)
-            self.calculate_gpas()
+            weights = course_weights(self.grades)
+            # Changed weighting rules invalidate every stored GPA, not just the periods with new grades
+            reusable = previous and previous.get('course_weights') == weights
+            periods = affected_periods(previous, self.grades, self.ordered_periods) if reusable else None
+            with self.metrics.timer('calculate_gpas'):
+                if periods is None:
+                    self.calculate_gpas()
+                else:
+                    logger.info(f"Recomputing GPAs for changed periods only: {sorted(periods)}")
+                    self.period_gpas = {period: gpa for period, gpa in previous['unweighted_gpas'].items()
+                                        if period not in periods}
+                    self.weighted_period_gpas = {period: gpa for period, gpa in previous['weighted_gpas'].items()
+                                                 if period not in periods}
+                    self.calculate_gpas([period for period in self.ordered_periods if period in periods])
             
             # Send final progress update
             self.send_progress_update("Calculating GPAs...", 80)
+            if self.trace.sampled:
+                self.trace.persist()
             
-            return {
+            result = {
                 'grades_raw': self.grades_raw,
                 'grades': self.grades,
                 'unweighted_gpas': self.period_gpas,
                 'weighted_gpas': self.weighted_period_gpas,
-                'ordered_periods': self.ordered_periods
+                'ordered_periods': self.ordered_periods,
+                'course_weights': weights
             }
+            if self.detail:
+                result['assignments'] = self.assignments
+            return result
         except Exception as e:
             logger.error(f"Error in calculate: {str(e)}")
             logger.error(f"Traceback: {traceback.format_exc()}")
+            self.trace.persist(error=e)
+            self.metrics.increment('skyward_failures_total', type=failure_type(e))
             raise
-        finally:
-            if self.driver:
+
+    def fetch_with_http(self):
+        """Log in and read the gradebook with plain HTTP requests"""
+        logger.info("Fetching gradebook with HTTP backend...")
+        saved = self.session_store.load(self.username, self.password)
+        backend = HttpSkywardBackend()
+        with self.metrics.timer('http_fetch'):
+            period_labels, rows, session = backend.fetch(
+                self.username, self.password, self.period_order, self.send_progress_update, saved, self.detail
+            )
+        self.apply_gradebook(period_labels, rows)
+        if not self.grades:
+            raise Exception("HTTP backend found no gradable classes")
+        self.assignments = {class_name: periods for class_name, periods in backend.details.items()
+                            if class_name in self.grades_raw}
+        self.session_store.save(self.username, self.password, session,
+                                [cookie['expiry'] for cookie in session['cookies']])
+
+    def fetch_with_selenium(self):
+        """Log in and read the gradebook by driving a pooled Chrome browser"""
+        try:
+            # Borrow a warm browser instead of launching a new one
+            self.driver = self.driver_pool.checkout()
+            
+            resumed = False
+            saved = self.session_store.load(self.username, self.password)
+            if saved and saved.get('backend') == 'selenium':
                 try:
-                    self.driver.quit()
+                    self.send_progress_update("Resuming Skyward session...", 20)
+                    with self.metrics.timer('resume_session'):
+                        self.resume_session(saved)
+                    self.send_progress_update("Accessing gradebook...", 35)
+                    with self.metrics.timer('navigate_to_gradebook'):
+                        self.navigate_to_gradebook()
+                    resumed = True
                 except Exception as e:
-                    logger.error(f"Error closing driver: {str(e)}")
+                    logger.info(f"Saved session rejected, logging in again: {str(e)}")
+                    self.metrics.increment('skyward_fallbacks_total', path='session_rejected')
+                    self.driver.delete_all_cookies()
+            
+            if not resumed:
+                # Send progress update before login
+                self.send_progress_update("Logging into Skyward...", 20)
+                with self.metrics.timer('login'):
+                    self.login()
+                
+                # Send progress update before gradebook navigation
+                self.send_progress_update("Accessing gradebook...", 35)
+                with self.metrics.timer('navigate_to_gradebook'):
+                    self.navigate_to_gradebook()
+                self.save_session()
+            
+            # Send progress update before grade extraction
+            self.send_progress_update("Extracting grades...", 50)
+            with self.metrics.timer('extract_grades'):
+                self.extract_grades()
+            if self.detail:
+                with self.metrics.timer('extract_details'):
+                    self.extract_details()
+        except Exception as e:
+            # Capture the page while the browser is still ours
+            self.trace.persist(self.driver, e)
+            raise
+        finally:
+            if self.driver:
+                self.driver_pool.release(self.driver)
+                self.driver = None
+
+    def save_session(self):
+        """Remember the authenticated cookies so the next request can skip login"""
+        if not self.home_url:
+            return
+        try:
+            cookies = self.driver.get_cookies()
+            self.session_store.save(self.username, self.password, {
+                'backend': 'selenium',
+                'home_url': self.home_url,
+                'cookies': cookies,
+            }, [cookie.get('expiry') for cookie in cookies])
+        except Exception as e:
+            logger.error(f"Failed to save Skyward session: {str(e)}")
+
+    def resume_session(self, saved):
+        """Load saved cookies and open the home page, failing fast if Skyward wants a login"""
+        for cookie in saved['cookies']:
+            params = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly')
+                      if key in cookie}
+            if cookie.get('expiry'):
+                params['expires'] = cookie['expiry']
+            self.driver.execute_cdp_cmd('Network.setCookie', params)
+        self.driver.get(saved['home_url'])
+        WebDriverWait(self.driver, 5).until(
+            EC.presence_of_element_located((By.XPATH, NAV_MENU_XPATH))
+        )
+        self.home_url = saved['home_url']
+        logger.info("Resumed saved Skyward session")
+
+    def apply_gradebook(self, period_labels, rows):
+        """Fill grades from header labels and (class name, cell texts) rows"""
+        logger.info(f"Period labels: {period_labels}")
+        self.period_labels = period_labels
+        self.ordered_periods = [period for period in self.period_order 
+                              if period in period_labels and 'C' not in period]
+        logger.info(f"Ordered periods: {self.ordered_periods}")
+
+        for class_name, cells in rows:
+            class_grades = {}
+            is_valid_class = True
+            for cell_index, text in enumerate(cells):
+                if text and text.replace('.', '').isnumeric():
+                    if cell_index < len(period_labels):
+                        class_grades[period_labels[cell_index]] = float(text)
+                elif text:  # If non-numeric grade found
+                    is_valid_class = False
+                    break
+
+            if is_valid_class and class_grades:
+                logger.info(f"Adding grades for {class_name}: {class_grades}")
+                self.grades_raw[class_name] = class_grades
+                filtered_grades = {period: grade for period, grade in class_grades.items() 
+                                if 'C' not in period}
+                if filtered_grades:
+                    self.grades[class_name] = filtered_grades
 
     def login(self):
         try:
             logger.info("Attempting to access login page...")
             self.send_progress_update("Connecting to Skyward...", 10)
-            self.driver.get("https://skyward-alvinprod.iscorp.com/scripts/wsisa.dll/WService=wsedualvinisdtx/fwemnu01.w")
+            self.driver.get(f"{SKYWARD_BASE_URL}/fwemnu01.w")
             
             # Take screenshot of initial login page
             self.take_debug_screenshot("01_initial_login_page")
@@ -141,34 +359,25 @@ class SkywardGPA:
             logger.info("Clicking to open username/password fields...")
             self.send_progress_update("Opening login form...", 15)
             
-            # Try the original XPath first
+            username_xpath = '/html/body/form[1]/div/div/div[4]/div[2]/div[1]/div[2]/div/table/tbody/tr[1]/td[2]/input'
+
+            def open_login_form(login_link):
+                # The link only counts as found once the username field shows up
+                login_link.click()
+                WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.XPATH, username_xpath)))
+
+            # Try whichever strategy found the link last time first
             try:
-                login_link = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, '/html/body/form[1]/div/div/div[4]/div[2]/div[1]/div[2]/div/table/tbody/tr[7]/td/a'))
+                self.locators.find(
+                    self.driver, 'login_link',
+                    on_fallback=lambda: self.take_debug_screenshot("02_login_page_failed_xpath"),
+                    confirm=open_login_form
                 )
-                logger.info("Found login link with original XPath")
-            except:
-                # If original XPath fails, try alternative approaches
-                logger.info("Original XPath failed, trying alternatives...")
-                self.take_debug_screenshot("02_login_page_failed_xpath")
-                
-                # Try to find any clickable link that might open login form
-                try:
-                    # Look for common login button text patterns
-                    login_link = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Login') or contains(text(), 'Sign In') or contains(text(), 'Enter')]"))
-                    )
-                    logger.info("Found login link with text-based search")
-                except:
-                    # Try to find any link in the form
-                    try:
-                        login_link = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, "//form//a"))
-                        )
-                        logger.info("Found login link with form-based search")
-                    except:
-                        raise Exception("Could not find login link - Skyward may have changed their login page layout")
-            login_link.click()
+            except Exception as e:
+                # A link that was clicked but never opened the form is a slow page, not a layout change
+                if "No locator strategy matched" not in str(e):
+                    raise
+                raise Exception("Could not find login link - Skyward may have changed their login page layout") from e
             
             # Take screenshot after clicking login link
             self.take_debug_screenshot("03_after_login_click")
@@ -176,7 +385,7 @@ class SkywardGPA:
             logger.info("Waiting for username input...")
             self.send_progress_update("Logging in...", 20)
             username_input = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, '/html/body/form[1]/div/div/div[4]/div[2]/div[1]/div[2]/div/table/tbody/tr[1]/td[2]/input'))
+                EC.presence_of_element_located((By.XPATH, username_xpath))
             )
             
             # Click, clear, and enter username
@@ -223,6 +432,7 @@ class SkywardGPA:
                 if len(self.driver.window_handles) > 1:
                     logger.info("New window detected - switching to it")
                     self.driver.switch_to.window(self.driver.window_handles[1])
+                    apply_lean_profile(self.driver)
                 else:
                     logger.info("No new window - staying in same tab")
                     # Wait for the main page to load in the same tab
@@ -255,6 +465,7 @@ class SkywardGPA:
                 self.send_progress_update("Switching to main window...", 25)
                 WebDriverWait(self.driver, 20).until(lambda d: len(d.window_handles) > 1)
                 self.driver.switch_to.window(self.driver.window_handles[1])
+                apply_lean_profile(self.driver)
                 logger.info("Successfully switched to new window")
             else:
                 logger.info("Already in main window - no switching needed")
@@ -265,6 +476,7 @@ class SkywardGPA:
             WebDriverWait(self.driver, 15).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
+            self.home_url = self.driver.current_url
             
             logger.info("Looking for gradebook button...")
             self.send_progress_update("Navigating to gradebook...", 35)
@@ -272,7 +484,7 @@ class SkywardGPA:
             # First check if sidebar needs expansion
             try:
                 logger.info("Checking if sidebar needs expansion...")
-                sidebar_xpath = '/html/body/div[1]/div[2]/div[2]/div[1]/div/ul[1]/li/a'
+                sidebar_xpath = SIDEBAR_XPATH
                 sidebar_button = self.driver.find_element(By.XPATH, sidebar_xpath)
                 
                 if sidebar_button.is_displayed():
@@ -289,20 +501,8 @@ class SkywardGPA:
             try:
                 logger.info("Attempting to find gradebook button...")
                 
-                # Try the updated XPath first
-                gradebook_xpath = '/html/body/div[1]/div[2]/div[2]/div[1]/div/ul[2]/li[2]/a'
-                try:
-                    gradebook_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, gradebook_xpath))
-                )
-                    logger.info("Found gradebook button using updated XPath")
-                except:
-                    # Fallback: look for any link with "Gradebook" text
-                    logger.info("XPath not found, trying text-based search...")
-                    gradebook_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Gradebook')]"))
-                    )
-                    logger.info("Found gradebook button using text search")
+                # Try whichever strategy found the button last time first
+                gradebook_button = self.locators.find(self.driver, 'gradebook_button')
                 
                 logger.info("Found gradebook button, attempting to click...")
                 
@@ -326,9 +526,7 @@ class SkywardGPA:
             logger.info("Waiting for gradebook to load...")
             try:
                 WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.XPATH, 
-                        '/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[1]/div/div[1]/div[1]/table/thead/tr/th'
-                    ))
+                    EC.presence_of_element_located((By.XPATH, GRADING_PERIODS_XPATH))
                 )
                 logger.info("Gradebook loaded successfully")
                 
@@ -342,13 +540,45 @@ class SkywardGPA:
             raise
 
     def extract_grades(self):
+        """Extract the grid in one script call, falling back to per-element reads"""
+        if os.environ.get('EXTRACT_MODE', 'bulk').lower() == 'bulk':
+            try:
+                self.extract_grades_bulk()
+                return
+            except Exception as e:
+                logger.warning(f"Bulk extraction failed, falling back to per-element extraction: {str(e)}")
+                self.metrics.increment('skyward_fallbacks_total', path='legacy_extract')
+                self.grades_raw = {}
+                self.grades = {}
+        self.extract_grades_legacy()
+
+    def extract_grades_bulk(self):
+        """Pull header row, class names and grade matrix with a single execute_script"""
+        logger.info("Starting bulk grade extraction...")
+        self.send_progress_update("Fetching gradebook...", 40)
+        grid = self.driver.execute_script(
+            BULK_EXTRACT_SCRIPT,
+            GRADING_PERIODS_XPATH, CLASSES_CONTAINER_XPATH, GRADE_ROWS_XPATH, CLASS_NAME_RELATIVE_XPATH
+        )
+        if not grid or not grid.get('labels') or not grid.get('rows'):
+            raise Exception("Gradebook grid is empty")
+
+        period_labels = [label or '-' for label in grid['labels']]
+        rows = [(row['name'], row['cells']) for row in grid['rows'] if row.get('name')]
+        logger.info(f"Found {len(period_labels)} grading periods and {len(rows)} class rows")
+        self.apply_gradebook(period_labels, rows)
+        self.send_progress_update(f"Getting grades ({len(rows)}/{len(rows)})...", 50)
+        logger.info("Grade extraction completed successfully")
+        logger.info(f"Total classes processed: {len(self.grades)}")
+
+    def extract_grades_legacy(self):
+        """Read the grid one WebDriver command at a time"""
         try:
             logger.info("Starting grade extraction...")
             self.send_progress_update("Fetching gradebook...", 40)
             # Extract grading periods
             logger.info("Finding grading periods...")
-            grading_periods_xpath = '/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[1]/div/div[1]/div[1]/table/thead/tr/th'
-            grading_periods = self.driver.find_elements(By.XPATH, grading_periods_xpath)
+            grading_periods = self.driver.find_elements(By.XPATH, GRADING_PERIODS_XPATH)
             logger.info(f"Found {len(grading_periods)} grading periods")
             
             # Store period labels
@@ -365,6 +595,7 @@ class SkywardGPA:
                     period_labels.append('-')
             
             logger.info(f"Period labels: {period_labels}")
+            self.period_labels = period_labels
 
             # Filter periods and maintain the correct order
             self.ordered_periods = [period for period in self.period_order 
@@ -373,8 +604,7 @@ class SkywardGPA:
 
             # Get classes container
             logger.info("Finding classes container...")
-            classes_container_xpath = '/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[2]/div[2]/table/tbody'
-            classes_container = self.driver.find_element(By.XPATH, classes_container_xpath)
+            classes_container = self.driver.find_element(By.XPATH, CLASSES_CONTAINER_XPATH)
             class_rows = classes_container.find_elements(By.XPATH, './tr')
             logger.info(f"Found {len(class_rows)} class rows")
 
@@ -387,7 +617,7 @@ class SkywardGPA:
                     self.send_progress_update(f"Getting grades ({class_index}/{len(class_rows)})...", progress)
                     
                     # Get class name
-                    class_name_xpath = f'/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[2]/div[2]/table/tbody/tr[{class_index}]/td/div/table/tbody/tr[1]/td[2]/span/a'
+                    class_name_xpath = f'{CLASSES_CONTAINER_XPATH}/tr[{class_index}]/{CLASS_NAME_RELATIVE_XPATH}'
                     class_name = self.driver.find_element(By.XPATH, class_name_xpath).text
                     logger.info(f"Processing class: {class_name}")
                     
@@ -395,7 +625,7 @@ class SkywardGPA:
                     class_grades = {}
                     is_valid_class = True
 
-                    row_xpath = f'/html/body/div[1]/div[2]/div[2]/div[2]/div/div[4]/div[4]/div[2]/div[1]/div/div[1]/div[2]/table/tbody/tr[{class_index}]'
+                    row_xpath = f'{GRADE_ROWS_XPATH}/tr[{class_index}]'
                     cells = self.driver.find_elements(By.XPATH, f'{row_xpath}/td')
                     logger.info(f"Found {len(cells)} grade cells for {class_name}")
 
@@ -433,55 +663,36 @@ class SkywardGPA:
             logger.error(traceback.format_exc())
             raise
 
-    def calculate_gpas(self):
-        # First, count how many valid classes we have total
-        total_valid_classes = len(self.grades)
-        
-        # Calculate unweighted GPAs
-        for period in self.ordered_periods:
-            total_gpa = 0
-            num_classes = 0
-            
-            # Check if all classes have grades for this period
-            classes_with_grades = sum(1 for class_grades in self.grades.values() if period in class_grades)
-            
-            # Only calculate GPA if all classes have grades
-            if classes_with_grades == total_valid_classes:
-                for class_name, class_grades in self.grades.items():
-                    if period in class_grades:
-                        grade = class_grades[period]
-                        gpa = 6.0 - (100 - grade) * 0.1
-                        total_gpa += gpa
-                        num_classes += 1
-                
-                if num_classes > 0:
-                    self.period_gpas[period] = total_gpa / num_classes
+    def extract_details(self):
+        """Fetch the assignments behind every graded cell, several dialogs at a time"""
+        logger.info("Fetching assignment details...")
+        self.send_progress_update("Fetching assignments...", 55)
+        columns = [index for index, label in enumerate(self.period_labels) if detail_period(label)]
+        self.driver.set_script_timeout(int(os.environ.get('DETAIL_TIMEOUT', 60)))
+        try:
+            results = self.driver.execute_async_script(
+                DETAIL_FETCH_SCRIPT, GRADE_ROWS_XPATH, CLASSES_CONTAINER_XPATH, CLASS_NAME_RELATIVE_XPATH,
+                columns, DETAIL_ATTRIBUTES, DETAIL_FORM, DETAIL_SESSION_FIELDS,
+                int(os.environ.get('DETAIL_CONCURRENCY', 4))
+            )
+        finally:
+            self.driver.set_script_timeout(30)
 
-        # Calculate weighted GPAs
-        for period in self.ordered_periods:
-            total_gpa = 0
-            num_classes = 0
-            
-            # Check if all classes have grades for this period
-            classes_with_grades = sum(1 for class_grades in self.grades.values() if period in class_grades)
-            
-            # Only calculate GPA if all classes have grades
-            if classes_with_grades == total_valid_classes:
-                for class_name, class_grades in self.grades.items():
-                    if period in class_grades:
-                        grade = class_grades[period]
-                        
-                        # Determine base GPA
-                        if "APA" in class_name or "Academic Dec 1" in class_name:
-                            base_gpa = 7.0
-                        elif "AP" in class_name or "Ind Study Tech Applications" in class_name:
-                            base_gpa = 8.0
-                        else:
-                            base_gpa = 6.0
-                        
-                        weighted_gpa = base_gpa - (100 - grade) * 0.1
-                        total_gpa += weighted_gpa
-                        num_classes += 1
-                
-                if num_classes > 0:
-                    self.weighted_period_gpas[period] = total_gpa / num_classes
+        for item in results:
+            if item['name'] not in self.grades_raw:
+                continue
+            period = self.period_labels[item['column']]
+            if item.get('error'):
+                logger.warning(f"Failed to fetch assignments for {item['name']} {period}: {item['error']}")
+                continue
+            self.assignments.setdefault(item['name'], {})[period] = parse_assignments(item['html'])
+        logger.info(f"Fetched assignments for {len(results)} grade cells")
+
+    def calculate_gpas(self, periods=None):
+        """Compute unweighted and weighted GPAs for periods in one vectorized pass"""
+        if periods is None:
+            periods = self.ordered_periods
+        
+        unweighted_gpas, weighted_gpas = compute_gpas(self.grades, periods)
+        self.period_gpas.update(unweighted_gpas)
+        self.weighted_period_gpas.update(weighted_gpas)
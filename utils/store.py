@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    owner_pid INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated_at);
+CREATE TABLE IF NOT EXISTS progress (
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT,
+    progress INTEGER,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (key, seq)
+);
+CREATE INDEX IF NOT EXISTS progress_created ON progress (created_at);
+"""
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedStore:
+    """SQLite-backed job and progress state shared by every gunicorn worker"""
+
+    def __init__(self, path=None, progress_limit=None, ttl=None, gc_interval=None):
+        self.path = path or os.environ.get('STORE_PATH', '/tmp/skyward_store.sqlite3')
+        self.progress_limit = progress_limit or int(os.environ.get('PROGRESS_BUFFER_SIZE', 50))
+        self.ttl = ttl if ttl is not None else int(os.environ.get('JOB_TTL', 600))
+        self.gc_interval = gc_interval if gc_interval is not None else int(os.environ.get('STORE_GC_INTERVAL', 60))
+        self._local = threading.local()
+        self._last_gc = 0.0
+        self._gc_lock = threading.Lock()
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # Jobs
+
+    def create_job(self, job_id):
+        now = time.time()
+        self.connect().execute(
+            'INSERT INTO jobs (id, status, owner_pid, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (job_id, 'queued', os.getpid(), now, now)
+        )
+        self.maybe_gc()
+
+    def update_job(self, job_id, status, result=None, error=None):
+        self.connect().execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?',
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+
+    def get_job(self, job_id):
+        """Return the job with its buffered progress, or None"""
+        row = self.connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'progress': self.get_progress(f"job:{job_id}"),
+        }
+
+    def job_states(self, job_ids):
+        """(status, updated_at, latest progress seq) for each existing job, in one query per 500 ids"""
+        states = {}
+        conn = self.connect()
+        for start in range(0, len(job_ids), 500):
+            chunk = job_ids[start:start + 500]
+            rows = conn.execute(
+                "SELECT id, status, updated_at, (SELECT MAX(seq) FROM progress WHERE key = 'job:' || id) AS seq "
+                f"FROM jobs WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for row in rows:
+                states[row['id']] = (row['status'], row['updated_at'], row['seq'])
+        return states
+
+    # Progress
+
+    def append_progress(self, key, message, progress):
+        """Append an update, keeping only the newest progress_limit entries per key"""
+        conn = self.connect()
+        now = time.time()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM progress WHERE key = ?', (key,)).fetchone()[0]
+            conn.execute(
+                'INSERT INTO progress (key, seq, message, progress, created_at) VALUES (?, ?, ?, ?, ?)',
+                (key, seq, message, progress, now)
+            )
+            conn.execute('DELETE FROM progress WHERE key = ? AND seq <= ?', (key, seq - self.progress_limit))
+        return seq
+
+    def get_progress(self, key, after_seq=0):
+        rows = self.connect().execute(
+            'SELECT seq, message, progress FROM progress WHERE key = ? AND seq > ? ORDER BY seq',
+            (key, after_seq)
+        ).fetchall()
+        return [{'seq': row['seq'], 'message': row['message'], 'progress': row['progress']} for row in rows]
+
+    def delete_progress(self, key):
+        self.connect().execute('DELETE FROM progress WHERE key = ?', (key,))
+
+    # Garbage collection
+
+    def maybe_gc(self):
+        """Run gc() if it has not run in this process for gc_interval seconds"""
+        if time.time() - self._last_gc < self.gc_interval:
+            return
+        if not self._gc_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_gc = time.time()
+            self.gc()
+        except Exception as e:
+            logger.error(f"Store garbage collection failed: {str(e)}")
+        finally:
+            self._gc_lock.release()
+
+    def gc(self):
+        """Drop expired jobs and progress, and fail jobs whose worker died"""
+        conn = self.connect()
+        cutoff = time.time() - self.ttl
+        orphaned = [row['id'] for row in conn.execute(
+            "SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall() if not _pid_alive(row['owner_pid'])]
+        for job_id in orphaned:
+            self.update_job(job_id, 'error', error="The server restarted while processing this request, please try again")
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            jobs = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'error') AND updated_at < ?", (cutoff,)
+            ).rowcount
+            progress = conn.execute('DELETE FROM progress WHERE created_at < ?', (cutoff,)).rowcount
+        if jobs or progress or orphaned:
+            logger.info(f"Store GC removed {jobs} jobs and {progress} progress updates, failed {len(orphaned)} orphaned jobs")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the per-process handle on the shared store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SharedStore()
+        return _store
@@ -0,0 +1,105 @@
+from collections import deque
+import json
+import os
+import random
+import shutil
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRACE_DIR = os.environ.get('TRACE_DIR', '/tmp/skyward_traces')
+
+# One script call per step instead of a full screenshot encode
+STEP_SCRIPT = "return {url: location.href, title: document.title, readyState: document.readyState};"
+
+
+class StepTrace:
+    """Per-request ring buffer of step captures, written to disk only on failure or when sampled"""
+
+    def __init__(self, request_id=None, capacity=None, sample_rate=None, metadata=None):
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        self.steps = deque(maxlen=capacity or int(os.environ.get('TRACE_BUFFER_SIZE', 20)))
+        if sample_rate is None:
+            sample_rate = float(os.environ.get('TRACE_SAMPLE_RATE', 0))
+        # Sampled requests keep full screenshots for every step
+        self.sampled = random.random() < sample_rate
+        self.metadata = metadata or {}
+        self.persisted = False
+
+    def capture(self, driver, step_name):
+        """Record a step; only sampled requests pay for a screenshot"""
+        entry = {'step': step_name, 'time': time.time()}
+        try:
+            entry.update(driver.execute_script(STEP_SCRIPT))
+            if self.sampled:
+                entry['png'] = driver.get_screenshot_as_png()
+        except Exception as e:
+            entry['capture_error'] = str(e)
+        self.steps.append(entry)
+
+    def persist(self, driver=None, error=None):
+        """Write the buffered steps (and a failure screenshot) under TRACE_DIR/<request_id>"""
+        if self.persisted:
+            return None
+        self.persisted = True
+        path = os.path.join(TRACE_DIR, self.request_id)
+        try:
+            os.makedirs(path, exist_ok=True)
+            steps = []
+            for index, entry in enumerate(self.steps, 1):
+                entry = dict(entry)
+                png = entry.pop('png', None)
+                if png:
+                    entry['screenshot'] = f"{index:02d}_{entry['step']}.png"
+                    with open(os.path.join(path, entry['screenshot']), 'wb') as f:
+                        f.write(png)
+                steps.append(entry)
+            if driver is not None and error is not None:
+                try:
+                    driver.save_screenshot(os.path.join(path, 'failure.png'))
+                except Exception as e:
+                    logger.error(f"Failed to take failure screenshot: {e}")
+            with open(os.path.join(path, 'trace.json'), 'w') as f:
+                json.dump({
+                    'request_id': self.request_id,
+                    'error': str(error) if error is not None else None,
+                    'sampled': self.sampled,
+                    'created_at': time.time(),
+                    'steps': steps,
+                    **self.metadata,
+                }, f, indent=2)
+            logger.info(f"Debug trace saved: {path}")
+            prune_traces()
+            return path
+        except Exception as e:
+            logger.error(f"Failed to save debug trace: {e}")
+            return None
+
+
+def list_traces():
+    """Saved traces, newest first"""
+    traces = []
+    if not os.path.isdir(TRACE_DIR):
+        return traces
+    for request_id in os.listdir(TRACE_DIR):
+        path = os.path.join(TRACE_DIR, request_id)
+        try:
+            with open(os.path.join(path, 'trace.json')) as f:
+                trace = json.load(f)
+        except (OSError, ValueError):
+            continue
+        trace['files'] = sorted(name for name in os.listdir(path) if name.endswith('.png'))
+        traces.append(trace)
+    traces.sort(key=lambda trace: trace.get('created_at', 0), reverse=True)
+    return traces
+
+
+def prune_traces(keep=None):
+    """Delete all but the newest traces"""
+    keep = keep if keep is not None else int(os.environ.get('TRACE_KEEP', 50))
+    paths = [os.path.join(TRACE_DIR, name) for name in os.listdir(TRACE_DIR)]
+    paths.sort(key=lambda path: os.path.getmtime(path), reverse=True)
+    for path in paths[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
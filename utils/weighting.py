@@ -0,0 +1,85 @@
+from collections import namedtuple
+import functools
+import json
+import os
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Alvin ISD. Rules are tried in order, so APA must come before AP.
+DEFAULT_RULES = {
+    'district': 'Alvin ISD',
+    'unweighted_base': 6.0,
+    'step': 0.1,
+    'default': 'Regular',
+    'rules': [
+        {'name': 'APA', 'patterns': ['APA', 'Academic Dec 1'], 'base': 7.0},
+        {'name': 'AP', 'patterns': ['AP', 'Ind Study Tech Applications'], 'base': 8.0},
+    ],
+}
+
+CourseWeight = namedtuple('CourseWeight', ['name', 'base', 'step'])
+
+
+class WeightingRules:
+    """A district's course weighting rules, compiled into one regex with cached lookups per class name"""
+
+    def __init__(self, config=None, cache_size=4096):
+        config = config or DEFAULT_RULES
+        self.district = config.get('district', 'custom')
+        self.unweighted_base = float(config.get('unweighted_base', 6.0))
+        self.step = float(config.get('step', 0.1))
+        self.default = CourseWeight(config.get('default', 'Regular'), self.unweighted_base, self.step)
+        self.weights = []
+        branches = []
+        for index, rule in enumerate(config.get('rules', [])):
+            if not rule.get('patterns') or 'base' not in rule:
+                raise ValueError(f"Weighting rule {index} needs 'patterns' and 'base'")
+            for pattern in rule['patterns']:
+                try:
+                    re.compile(f"(?:{pattern})")
+                except re.error as e:
+                    raise ValueError(f"Bad pattern {pattern!r} in weighting rule {index}: {e}")
+            self.weights.append(CourseWeight(rule.get('name', f'rule{index}'), float(rule['base']),
+                                             float(rule.get('step', self.step))))
+            # Flags must be scoped to the branch, since every rule shares one regex
+            flags = '(?i:' if rule.get('ignore_case') else '(?:'
+            # Each branch looks ahead over the whole name, so the first rule to match anywhere wins
+            # rather than whichever pattern occurs earliest in the name
+            branches.append(f"(?=.*?{flags}{'|'.join(rule['patterns'])}))(?P<r{index}>)")
+        self._matcher = re.compile(f"^(?:{'|'.join(branches)})", re.DOTALL) if branches else None
+        self.classify = functools.lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, class_name):
+        """Weight of a course, from the first rule whose patterns match its name"""
+        match = self._matcher.match(class_name) if self._matcher else None
+        if match is None:
+            return self.default
+        return self.weights[int(match.lastgroup[1:])]
+
+    def base_gpa(self, class_name):
+        """Weighted base GPA for a course"""
+        return self.classify(class_name).base
+
+    @classmethod
+    def from_file(cls, path):
+        """Load rules from a JSON file shaped like DEFAULT_RULES"""
+        with open(path) as f:
+            return cls(json.load(f))
+
+
+_rules = None
+_rules_lock = threading.Lock()
+
+
+def get_weighting_rules():
+    """Return the rules from WEIGHTING_RULES (a JSON file), or the Alvin ISD defaults"""
+    global _rules
+    with _rules_lock:
+        if _rules is None:
+            path = os.environ.get('WEIGHTING_RULES')
+            _rules = WeightingRules.from_file(path) if path else WeightingRules()
+            logger.info(f"Loaded {len(_rules.weights)} course weighting rules for {_rules.district}")
+        return _rules